@@ -0,0 +1,150 @@
+"""
+Per-endpoint admission control and load shedding.
+
+Each endpoint in ADMISSION_LIMITS gets a concurrency limit per worker and a
+short queue. A request that finds the endpoint busy waits up to `timeout`
+seconds for a slot; when the queue is already full or the wait runs out it is
+answered at once with 429 and a Retry-After header, instead of tying up a
+worker thread.
+
+Low-priority endpoints (the AJAX helpers, the default) must first take one of
+ADMISSION_AJAX_CONCURRENCY shared slots, by default three quarters of
+GUNICORN_THREADS, whether they then run or queue. The remaining threads stay
+free for page routes such as index and view_article, and a request turned
+away by the shared pool gets a 503. Keep queues short: a queued request holds
+a worker thread while it waits. Outcomes and queue waits are exported through
+/metrics.
+"""
+import logging
+import os
+import threading
+import time
+
+from flask import g, jsonify, request
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ADMITTED = 'admitted'
+QUEUED = 'queued'
+QUEUE_FULL = 'rejected_queue_full'
+TIMED_OUT = 'rejected_timeout'
+
+
+class Limiter:
+    """Counting semaphore with a bounded number of waiters and a wait timeout"""
+
+    def __init__(self, concurrency, queue=0, timeout=0.0):
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Take a slot; returns ADMITTED, QUEUED, QUEUE_FULL or TIMED_OUT"""
+        with self._cond:
+            if self.active < self.concurrency:
+                self.active += 1
+                return ADMITTED
+            if self.waiting >= self.queue:
+                return QUEUE_FULL
+            self.waiting += 1
+            try:
+                deadline = time.monotonic() + self.timeout
+                while self.active >= self.concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return TIMED_OUT
+                    self._cond.wait(remaining)
+                self.active += 1
+                return QUEUED
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+class AdmissionControl:
+    """Flask extension enforcing ADMISSION_LIMITS before a view runs"""
+
+    def __init__(self, app=None):
+        self.limiters = {}
+        self.settings = {}
+        self.ajax_pool = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ADMISSION_ENABLED', True)
+        app.config.setdefault('ADMISSION_LIMITS', {})
+        app.config.setdefault('ADMISSION_AJAX_CONCURRENCY', 0)
+        if not app.config['ADMISSION_ENABLED']:
+            return
+
+        for endpoint, limits in app.config['ADMISSION_LIMITS'].items():
+            self.settings[endpoint] = {
+                'priority': limits.get('priority', 'low'),
+                'retry_after': limits.get('retry_after', 1),
+            }
+            self.limiters[endpoint] = Limiter(limits['concurrency'], limits.get('queue', 0),
+                                              limits.get('timeout', 0.0))
+
+        ajax_concurrency = app.config['ADMISSION_AJAX_CONCURRENCY']
+        if not ajax_concurrency and os.environ.get('GUNICORN_THREADS'):
+            ajax_concurrency = max(1, int(os.environ['GUNICORN_THREADS']) * 3 // 4)
+        if ajax_concurrency:
+            # Counts running and queued low-priority requests; it never queues itself
+            self.ajax_pool = Limiter(ajax_concurrency)
+
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions['admission'] = self
+
+    def _before_request(self):
+        endpoint = request.endpoint
+        limiter = self.limiters.get(endpoint)
+        if limiter is None:
+            return None
+
+        start = time.perf_counter()
+        g.admission_slots = []
+        # A queued request holds a worker thread too, so the shared pool is taken before queueing
+        if self.ajax_pool is not None and self.settings[endpoint]['priority'] == 'low':
+            if self.ajax_pool.acquire() != ADMITTED:
+                return self._reject(endpoint, 'rejected_shared_pool', 503, start)
+            g.admission_slots.append(self.ajax_pool)
+
+        outcome = limiter.acquire()
+        if outcome in (QUEUE_FULL, TIMED_OUT):
+            return self._reject(endpoint, outcome, 429, start)
+        g.admission_slots.append(limiter)
+
+        metrics.store.inc('timeless_admission_total', {'endpoint': endpoint, 'outcome': outcome})
+        if outcome == QUEUED:
+            metrics.store.observe('timeless_admission_wait_seconds', {'endpoint': endpoint},
+                                  time.perf_counter() - start)
+        return None
+
+    def _reject(self, endpoint, outcome, status, start):
+        metrics.store.inc('timeless_admission_total', {'endpoint': endpoint, 'outcome': outcome})
+        if outcome == TIMED_OUT:
+            metrics.store.observe('timeless_admission_wait_seconds', {'endpoint': endpoint},
+                                  time.perf_counter() - start)
+        logger.warning('Shedding %s: %s', endpoint, outcome)
+        response = jsonify({'error': 'Server is busy, please retry shortly'})
+        response.status_code = status
+        response.headers['Retry-After'] = str(self.settings[endpoint]['retry_after'])
+        return response
+
+    def _teardown_request(self, exc):
+        for limiter in reversed(g.pop('admission_slots', [])):
+            limiter.release()
+
+
+admission = AdmissionControl()
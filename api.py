@@ -0,0 +1,193 @@
+"""JSON helpers used by the map and translation scripts"""
+import logging
+from flask import Blueprint, current_app, request, jsonify
+
+import clients
+import translation_memory
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('api', __name__)
+
+# Available languages for translation
+LANGUAGES = {
+    'en': 'English',
+    'hi': 'Hindi',
+    'bn': 'Bengali',
+    'te': 'Telugu',
+    'mr': 'Marathi',
+    'ta': 'Tamil',
+    'ur': 'Urdu',
+    'gu': 'Gujarati',
+    'kn': 'Kannada',
+    'ml': 'Malayalam',
+    'pa': 'Punjabi',
+    'or': 'Odia',
+    'es': 'Spanish',
+    'fr': 'French',
+    'de': 'German',
+    'zh': 'Chinese',
+    'ja': 'Japanese',
+    'ru': 'Russian',
+    'ar': 'Arabic'
+}
+
+@bp.route('/geocode')
+def geocode():
+    """Geocode a location string to coordinates using Nominatim"""
+    location = request.args.get('location', '')
+    if not location:
+        return jsonify({'error': 'No location provided'}), 400
+        
+    try:
+        # Use Nominatim for geocoding
+        with metrics.outbound('nominatim_search'):
+            data = clients.nominatim('search', {'q': location, 'format': 'json', 'limit': 1})
+        
+        if not data:
+            return jsonify({'error': 'Location not found'}), 404
+            
+        result = data[0]
+        return jsonify({
+            'lat': result['lat'],
+            'lon': result['lon'],
+            'address': {
+                'state': result.get('address', {}).get('state'),
+                'county': result.get('address', {}).get('county'),
+                'village': result.get('address', {}).get('village'),
+                'town': result.get('address', {}).get('town'),
+                'city': result.get('address', {}).get('city')
+            }
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/reverse_geocode')
+def reverse_geocode():
+    """Reverse geocode coordinates to location details using Nominatim"""
+    try:
+        lat = request.args.get('lat')
+        lon = request.args.get('lon')
+        
+        if not lat or not lon:
+            return jsonify({'error': 'Missing coordinates'}), 400
+            
+        # Use Nominatim for reverse geocoding
+        with metrics.outbound('nominatim_reverse'):
+            data = clients.nominatim('reverse', {'lat': lat, 'lon': lon, 'format': 'json'})
+        
+        if not data or 'address' not in data:
+            return jsonify({'error': 'Location not found'}), 404
+            
+        return jsonify({
+            'address': {
+                'state': data['address'].get('state'),
+                'county': data['address'].get('county'),
+                'village': data['address'].get('village'),
+                'town': data['address'].get('town'),
+                'city': data['address'].get('city')
+            }
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/translate', methods=['POST'])
+def translate_text():
+    try:
+        data = request.json
+        logger.info(f"Received translation request: {data}")
+        
+        if not data or 'texts' not in data or 'target_lang' not in data:
+            logger.error("Invalid request parameters")
+            return jsonify({'error': 'Invalid request parameters'}), 400
+        
+        texts = data['texts']
+        target_lang = data['target_lang']
+        
+        # Check if inputs are valid
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            logger.error("Invalid texts format")
+            return jsonify({'error': 'Texts must be a list of strings'}), 400
+        
+        # Anyone may call this, and new sentences are stored, so bound the work per request
+        max_texts = current_app.config.get('TRANSLATE_MAX_TEXTS', 50)
+        max_chars = current_app.config.get('TRANSLATE_MAX_CHARS', 20000)
+        if len(texts) > max_texts or sum(len(text) for text in texts) > max_chars:
+            logger.error(f"Translation request too large: {len(texts)} texts")
+            return jsonify({'error': f'At most {max_texts} texts and {max_chars} characters per request'}), 400
+        
+        if not isinstance(target_lang, str) or len(target_lang) != 2:
+            logger.error(f"Invalid target language: {target_lang}")
+            return jsonify({'error': 'Target language must be a 2-letter language code'}), 400
+        
+        # Validate target language code
+        if target_lang not in LANGUAGES:
+            logger.error(f"Unsupported language code: {target_lang}")
+            return jsonify({'error': f'Invalid language code: {target_lang}'}), 400
+        
+        def translate_segment(text):
+            with metrics.outbound('google_translate'):
+                translated_text = clients.translate(text, target_lang)
+            if not translated_text:
+                raise Exception("Empty translation received")
+            return translated_text
+
+        if current_app.config.get('TRANSLATION_MEMORY_ENABLED', True):
+            # Only sentences without a stored translation reach the translator, concurrently
+            logger.info(f"Translating {len(texts)} texts to {target_lang} via translation memory")
+            try:
+                with metrics.outbound_wait():
+                    translations = translation_memory.translate_texts(
+                        texts, target_lang, translate_segment,
+                        max_stored_length=current_app.config.get('TRANSLATION_MEMORY_MAX_SEGMENT', 1000))
+            except Exception as e:
+                logger.error(f"Error translating texts: {str(e)}")
+                return jsonify({'error': f'Translation failed: {str(e)}'}), 500
+        else:
+            # Skip translation if text is empty
+            pending = [(i, text) for i, text in enumerate(texts) if text and text.strip() != '']
+            translations = [''] * len(texts)
+
+            # Texts are translated concurrently, so a batch costs one round trip instead of one per text
+            with metrics.outbound_wait():
+                results = clients.map_outbound(lambda item: translate_segment(item[1]), pending)
+            for (i, _), (translated_text, error) in zip(pending, results):
+                if error is not None:
+                    logger.error(f"Error translating text {i}: {str(error)}")
+                    return jsonify({'error': f'Translation failed: {str(error)}'}), 500
+                translations[i] = translated_text
+
+        response = {'translations': translations}
+        logger.info(f"Sending response with {len(translations)} translations")
+        return jsonify(response)
+    
+    except Exception as e:
+        logger.error(f"Translation error: {str(e)}")
+        return jsonify({'error': 'Translation failed', 'details': str(e)}), 500
+
+@bp.route('/api/validate_coordinates', methods=['POST'])
+def validate_coordinates():
+    """Validate coordinates are within valid ranges"""
+    data = request.get_json()
+    lat = data.get('latitude')
+    lng = data.get('longitude')
+    
+    if lat is None or lng is None:
+        return jsonify({'error': 'Coordinates required'}), 400
+    
+    try:
+        lat = float(lat)
+        lng = float(lng)
+        
+        if -90 <= lat <= 90 and -180 <= lng <= 180:
+            return jsonify({'valid': True})
+        return jsonify({'valid': False, 'error': 'Coordinates out of range'})
+        
+    except ValueError:
+        return jsonify({'valid': False, 'error': 'Invalid coordinate format'})
+
+# Language list route for translation feature
+@bp.route('/languages')
+def get_languages():
+    return jsonify(LANGUAGES)
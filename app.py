@@ -1,32 +1,29 @@
-from flask import Flask, request, jsonify
-from flask_login import LoginManager
-from flask_migrate import Migrate
-from models import db, User
 import os
-from flask_wtf.csrf import CSRFProtect
-import requests
-from urllib.parse import quote
 
-app = Flask(__name__)
+import click
+from flask import Flask
+from flask.cli import ScriptInfo
+from flask_login import LoginManager
+from flask_wtf.csrf import CSRFProtect
+from jinja2 import FileSystemBytecodeCache
 
-# Load configuration from config.py
 from config import Config
-app.config.from_object(Config)
-
-# Ensure upload folder exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-# Initialize extensions
-db.init_app(app)
-migrate = Migrate(app, db)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
+from models import db
+import db_profile
+from admission import admission
+from group_commit import comment_writes
+from invalidation import invalidation
+from metrics import metrics
+from query_budget import query_budgets
+from search_cache import search_cache
+from user_cache import user_cache
 
-# Initialize CSRF protection
-csrf = CSRFProtect(app)
+# Extensions are created unbound and attached to each app in create_app()
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
+csrf = CSRFProtect()
 
-# Add the custom filter for rendering newlines in text
-@app.template_filter('better_nl2br')
+# Custom filter for rendering newlines in text
 def better_nl2br(text):
     """
     Convert newlines to <br> tags but handle extra spaces and empty lines properly.
@@ -50,80 +47,96 @@ def better_nl2br(text):
         result = result[:-4]
     return result
 
+def private_directory(path):
+    """
+    Create path with mode 0700 if missing and report whether only the current
+    user can write to it. Cached bytecode is unmarshalled as code, so a
+    directory someone else created first must not be used.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.stat(path)
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+class LazyMigrateGroup(click.Group):
+    """
+    `flask db` group that imports Flask-Migrate (and with it Alembic) only when
+    a migration command is actually used, instead of on every app start.
+    """
+
+    def _migrate_group(self, ctx):
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as db_cli_group
+        app = ctx.ensure_object(ScriptInfo).load_app()
+        if 'migrate' not in app.extensions:
+            Migrate(app, db)
+        return db_cli_group
+
+    def list_commands(self, ctx):
+        return self._migrate_group(ctx).list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._migrate_group(ctx).get_command(ctx, name)
+
 @login_manager.user_loader
 def load_user(id):
-    return User.query.get(int(id))
-
-@app.route('/geocode')
-def geocode():
-    """Geocode a location string to coordinates using Nominatim"""
-    location = request.args.get('location', '')
-    if not location:
-        return jsonify({'error': 'No location provided'}), 400
-        
-    try:
-        # Use Nominatim for geocoding
-        url = f'https://nominatim.openstreetmap.org/search?q={quote(location)}&format=json&limit=1'
-        headers = {'User-Agent': 'TimelessEchoes/1.0'}
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        data = response.json()
-        if not data:
-            return jsonify({'error': 'Location not found'}), 404
-            
-        result = data[0]
-        return jsonify({
-            'lat': result['lat'],
-            'lon': result['lon'],
-            'address': {
-                'state': result.get('address', {}).get('state'),
-                'county': result.get('address', {}).get('county'),
-                'village': result.get('address', {}).get('village'),
-                'town': result.get('address', {}).get('town'),
-                'city': result.get('address', {}).get('city')
-            }
-        })
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/reverse_geocode')
-def reverse_geocode():
-    """Reverse geocode coordinates to location details using Nominatim"""
-    try:
-        lat = request.args.get('lat')
-        lon = request.args.get('lon')
-        
-        if not lat or not lon:
-            return jsonify({'error': 'Missing coordinates'}), 400
-            
-        # Use Nominatim for reverse geocoding
-        url = f'https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json'
-        headers = {'User-Agent': 'TimelessEchoes/1.0'}
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        data = response.json()
-        if not data or 'address' not in data:
-            return jsonify({'error': 'Location not found'}), 404
-            
-        return jsonify({
-            'address': {
-                'state': data['address'].get('state'),
-                'county': data['address'].get('county'),
-                'village': data['address'].get('village'),
-                'town': data['address'].get('town'),
-                'city': data['address'].get('city')
-            }
-        })
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-# Import routes at the end to avoid circular imports
-from routes import *
+    return user_cache.load(int(id))
+
+def create_app(config_class=Config):
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+
+    # Ensure upload folder exists
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    # Initialize extensions
+    db.init_app(app)
+    db_profile.init_app(app, db)
+    login_manager.init_app(app)
+    csrf.init_app(app)
+
+    # Request, SQL, template and outbound timing exposed at /metrics
+    metrics.init_app(app)
+
+    # Per-endpoint query budgets and N+1 detection (sampled in production)
+    query_budgets.init_app(app)
+    user_cache.init_app(app)
+    search_cache.init_app(app)
+    invalidation.init_app(app)
+    invalidation.subscribe('articles', search_cache.bump)
+    invalidation.subscribe('users', user_cache.clear)
+    admission.init_app(app)
+    comment_writes.init_app(app)
+
+    # Keep compiled templates on disk so fresh workers skip Jinja compilation
+    if app.config.get('JINJA_BYTECODE_CACHE', True):
+        cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+        if cache_dir and not private_directory(cache_dir):
+            app.logger.warning('Ignoring JINJA_BYTECODE_CACHE_DIR %s: it must be owned by this user '
+                               'and not writable by others', cache_dir)
+            cache_dir = None
+        # Without a directory Jinja creates and checks a private per-user one
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    app.add_template_filter(better_nl2br, 'better_nl2br')
+
+    from routes import bp as main_bp
+    from api import bp as api_bp
+    app.register_blueprint(main_bp)
+    app.register_blueprint(api_bp)
+
+    # CLI commands
+    app.cli.add_command(LazyMigrateGroup('db', help='Perform database migrations.'))
+    from importer import import_articles_command
+    from exporter import export_articles_command
+    from translation_memory import prune_translations_command
+    app.cli.add_command(import_articles_command)
+    app.cli.add_command(export_articles_command)
+    app.cli.add_command(prune_translations_command)
+
+    return app
 
 if __name__ == '__main__':
+    app = create_app()
     with app.app_context():
         # Create database tables if they don't exist
         db.create_all()
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
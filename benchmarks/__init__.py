@@ -0,0 +1,16 @@
+"""
+Offline benchmark suite for Timeless Echoes.
+
+    python -m benchmarks generate --articles 100000 --comments 1000000
+    python -m benchmarks run --articles 100000 --comments 1000000 --output bench.json
+    python -m benchmarks compare old.json new.json
+    python -m benchmarks concurrency --readers 8 --writers 4
+    python -m benchmarks startup
+    python -m benchmarks outbound --delay 0.2 --concurrency 64
+    python -m benchmarks shedding --flood 64
+    python -m benchmarks comments --writers 1 8 64
+
+Synthetic data is deterministic for a given seed, and the translator and
+Nominatim backends are replaced by in-process stubs, so runs need no network
+and results can be compared between commits.
+"""
@@ -0,0 +1,266 @@
+"""Command line entry point: python -m benchmarks {generate,run,concurrency,startup,outbound,shedding,comments,compare}"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def database_path(args):
+    return os.path.join(DATA_DIR, f'bench_{args.articles}_{args.comments}_{args.seed}.db')
+
+
+def load_app(args):
+    """Build the app against the benchmark database; must run before anything imports config.py"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_path(args)}'
+    os.environ.setdefault('METRICS_DIR', os.path.join(DATA_DIR, 'metrics'))
+    os.environ.setdefault('QUERY_BUDGET_SAMPLE_RATE', '0')
+    os.environ.setdefault('SLOW_REQUEST_THRESHOLD', '0')
+    from app import create_app
+    from benchmarks import stubs
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    stubs.install(latency=args.stub_latency)
+    return app
+
+
+def ensure_data(app, args):
+    from benchmarks import datagen
+
+    if os.path.exists(database_path(args)):
+        return
+    print(f'Generating {args.articles} articles and {args.comments} comments...', file=sys.stderr)
+    with app.app_context():
+        datagen.generate(articles=args.articles, comments=args.comments, seed=args.seed)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cmd_generate(args):
+    ensure_data(load_app(args), args)
+    print(database_path(args))
+
+
+def cmd_run(args):
+    from benchmarks import load, micro
+
+    app = load_app(args)
+    ensure_data(app, args)
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'articles': args.articles,
+            'comments': args.comments,
+            'seed': args.seed,
+            'stub_latency': args.stub_latency,
+        },
+        'micro': micro.run(app, repeat=args.repeat),
+    }
+    if args.duration > 0:
+        results['load'] = load.run(app, concurrency=args.concurrency, duration=args.duration,
+                                   article_count=args.articles, seed=args.seed,
+                                   user_id=1 if args.logged_in else None)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+def cmd_concurrency(args):
+    from benchmarks import concurrency
+
+    args.stub_latency = 0.0
+    if args.database_url:
+        results = concurrency.run(database_url=args.database_url, readers=args.readers,
+                                  writers=args.writers, duration=args.duration)
+    else:
+        ensure_data(load_app(args), args)
+        results = concurrency.run(database_path=database_path(args), readers=args.readers,
+                                  writers=args.writers, duration=args.duration,
+                                  article_count=args.articles)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+def cmd_startup(args):
+    from benchmarks import startup
+
+    results = startup.run(runs=args.runs)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+def cmd_outbound(args):
+    from benchmarks import outbound
+
+    results = outbound.run(delay=args.delay, workers=args.workers, threads=args.threads,
+                           concurrency=args.concurrency, duration=args.duration,
+                           batch_size=args.batch_size, sentences=args.sentences)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+def cmd_shedding(args):
+    from benchmarks import shedding
+
+    args.stub_latency = 0.0
+    ensure_data(load_app(args), args)
+    results = shedding.run(delay=args.delay, threads=args.threads, flood=args.flood,
+                           pages=args.pages, duration=args.duration)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+def cmd_comments(args):
+    from benchmarks import comments
+
+    args.stub_latency = 0.0
+    app = load_app(args)
+    ensure_data(app, args)
+    results = comments.run(app, database_path(args), writer_counts=args.writers, workers=args.workers,
+                           threads=args.threads, duration=args.duration, article_count=args.articles)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+def cmd_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    regressions = []
+    print(f'{"case":<20} {"baseline ms":>12} {"candidate ms":>13} {"ratio":>7}')
+    for name, old in baseline['micro'].items():
+        new = candidate['micro'].get(name)
+        if new is None:
+            continue
+        ratio = new['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+        print(f'{name:<20} {old["median_ms"]:>12.3f} {new["median_ms"]:>13.3f} {ratio:>7.2f}')
+        if ratio > args.threshold:
+            regressions.append(name)
+    if 'load' in baseline and 'load' in candidate:
+        print(f'{"load throughput":<20} {baseline["load"]["throughput_rps"]:>12.1f} '
+              f'{candidate["load"]["throughput_rps"]:>13.1f}')
+    if regressions:
+        print(f'Regressions above {args.threshold}x: {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def data_args(p):
+        p.add_argument('--articles', type=int, default=10000)
+        p.add_argument('--comments', type=int, default=100000)
+        p.add_argument('--seed', type=int, default=42)
+        p.add_argument('--stub-latency', type=float, default=0.0,
+                       help='simulated seconds per translator/geocoder call')
+
+    p = sub.add_parser('generate', help='build the synthetic database')
+    data_args(p)
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser('run', help='run micro-benchmarks and the load driver')
+    data_args(p)
+    p.add_argument('--repeat', type=int, default=50)
+    p.add_argument('--concurrency', type=int, default=8)
+    p.add_argument('--duration', type=float, default=10.0, help='load test seconds, 0 to skip')
+    p.add_argument('--logged-in', action='store_true', help='send load test requests as a logged-in user')
+    p.add_argument('--output', help='write JSON results to this file')
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser('concurrency', help='database read/write concurrency, default vs tuned profile')
+    p.add_argument('--articles', type=int, default=10000)
+    p.add_argument('--comments', type=int, default=100000)
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--readers', type=int, default=8)
+    p.add_argument('--writers', type=int, default=4)
+    p.add_argument('--duration', type=float, default=5.0)
+    p.add_argument('--database-url', help='benchmark an already populated server database instead')
+    p.add_argument('--output', help='write JSON results to this file')
+    p.set_defaults(func=cmd_concurrency)
+
+    p = sub.add_parser('startup', help='cold import/create_app time and per-worker memory')
+    p.add_argument('--runs', type=int, default=5)
+    p.add_argument('--output', help='write JSON results to this file')
+    p.set_defaults(func=cmd_startup)
+
+    p = sub.add_parser('outbound', help='geocode capacity per gunicorn profile against a slow stub server')
+    p.add_argument('--delay', type=float, default=0.2, help='stub server seconds per request')
+    p.add_argument('--workers', type=int, default=2)
+    p.add_argument('--threads', type=int, default=32)
+    p.add_argument('--concurrency', type=int, default=64)
+    p.add_argument('--duration', type=float, default=5.0)
+    p.add_argument('--batch-size', type=int, default=10, help='texts per /translate call')
+    p.add_argument('--sentences', type=int, default=40, help='sentences in the edited description')
+    p.add_argument('--output', help='write JSON results to this file')
+    p.set_defaults(func=cmd_outbound)
+
+    p = sub.add_parser('shedding', help='page latency while /api/reverse_geocode is flooded, admission off vs on')
+    p.add_argument('--articles', type=int, default=10000)
+    p.add_argument('--comments', type=int, default=100000)
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--delay', type=float, default=0.5, help='stub server seconds per request')
+    p.add_argument('--threads', type=int, default=16)
+    p.add_argument('--flood', type=int, default=64, help='clients flooding reverse geocoding')
+    p.add_argument('--pages', type=int, default=2, help='clients per page route')
+    p.add_argument('--duration', type=float, default=5.0)
+    p.add_argument('--output', help='write JSON results to this file')
+    p.set_defaults(func=cmd_shedding)
+
+    p = sub.add_parser('comments', help='comments per second by concurrent writers, group commit off vs on')
+    p.add_argument('--articles', type=int, default=10000)
+    p.add_argument('--comments', type=int, default=100000)
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--writers', type=int, nargs='+', default=[1, 8, 64], help='concurrent writer counts')
+    p.add_argument('--workers', type=int, default=2)
+    p.add_argument('--threads', type=int, default=64)
+    p.add_argument('--duration', type=float, default=5.0)
+    p.add_argument('--output', help='write JSON results to this file')
+    p.set_defaults(func=cmd_comments)
+
+    p = sub.add_parser('compare', help='compare two result files')
+    p.add_argument('baseline')
+    p.add_argument('candidate')
+    p.add_argument('--threshold', type=float, default=1.2, help='median ratio counted as a regression')
+    p.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Comment write throughput benchmark.
+
+A gthread gunicorn server runs against a scratch copy of the benchmark
+database while 1, 8 and 64 logged-in clients post comments as fast as they
+can, once with one transaction per comment and once with group commit
+(group_commit.py). Reported are comments per second, per-request latency and
+the status codes received (302 is a stored comment; 'server_error' counts
+requests the server dropped without a response, 'connection_error' those that
+never reached it).
+"""
+import http.client
+import os
+import random
+import sqlite3
+import threading
+import time
+import urllib.parse
+from collections import Counter
+
+from flask import session
+from flask_wtf.csrf import generate_csrf
+
+from benchmarks.micro import summarize
+from benchmarks.outbound import DATA_DIR, gunicorn_server
+
+
+def login_cookie(app, user_id):
+    """Session cookie and CSRF token a logged-in browser would hold, signed with the app's key"""
+    with app.test_request_context():
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+        token = generate_csrf()
+        cookie = app.session_interface.get_signing_serializer(app).dumps(dict(session))
+    return f'{app.config["SESSION_COOKIE_NAME"]}={cookie}', token
+
+
+def post_comments(base, cookie, token, writers, duration, article_count, seed=42):
+    url = urllib.parse.urlsplit(base)
+    samples = []
+    statuses = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def writer(index):
+        rng = random.Random(seed + index)
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+        headers = {'Cookie': cookie, 'Content-Type': 'application/x-www-form-urlencoded'}
+        while time.perf_counter() < deadline:
+            body = urllib.parse.urlencode({'csrf_token': token, 'body': f'Benchmark comment from writer {index}'})
+            start = time.perf_counter()
+            try:
+                conn.request('POST', f'/article/{rng.randint(1, article_count)}/comment', body, headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                conn = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+                # gunicorn closes without a response when the app's error handler fails too
+                status = 'server_error' if isinstance(e, http.client.RemoteDisconnected) else 'connection_error'
+            with lock:
+                statuses[status] += 1
+                if status == 302:
+                    samples.append(time.perf_counter() - start)
+        conn.close()
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'comments_per_s': round(len(samples) / elapsed, 1),
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'latency': summarize(samples) if samples else None,
+    }
+
+
+def run_case(database_path, cookie, token, group_commit, writers, workers, threads, duration, article_count):
+    scratch = os.path.join(DATA_DIR, 'comments.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(scratch + suffix):
+            os.remove(scratch + suffix)
+    # The backup API copies committed pages still sitting in the source's WAL file
+    source, target = sqlite3.connect(database_path), sqlite3.connect(scratch)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+    with gunicorn_server('io', workers, threads, DATABASE_URL=f'sqlite:///{scratch}',
+                         ADMISSION_ENABLED='0', GROUP_COMMIT_ENABLED='1' if group_commit else '0') as base:
+        return post_comments(base, cookie, token, writers, duration, article_count)
+
+
+def run(app, database_path, writer_counts=(1, 8, 64), workers=2, threads=64, duration=5.0, article_count=10000):
+    cookie, token = login_cookie(app, user_id=1)
+    results = {'workers': workers, 'threads': threads, 'duration_s': duration}
+    for writers in writer_counts:
+        results[f'writers_{writers}'] = {
+            'per_comment': run_case(database_path, cookie, token, False, writers, workers, threads,
+                                    duration, article_count),
+            'group_commit': run_case(database_path, cookie, token, True, writers, workers, threads,
+                                     duration, article_count),
+        }
+    return results
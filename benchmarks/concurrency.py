@@ -0,0 +1,119 @@
+"""
+Read/write concurrency benchmark for the database profile.
+
+Reader and writer processes (standing in for gunicorn workers) hammer a copy
+of the benchmark database, once with a plain engine and SQLite defaults and
+once with the tuned profile from db_profile.py. Reported are operations per
+second and "database is locked" failures for each role.
+"""
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+
+import db_profile
+from benchmarks.micro import summarize
+from models import Article, Comment
+
+
+def _make_engine(uri, tuned):
+    if not tuned:
+        return create_engine(uri)
+    engine = create_engine(uri, **db_profile.engine_options(uri))
+    db_profile.apply_sqlite_pragmas(engine, db_profile.sqlite_pragmas())
+    return engine
+
+
+def _read(conn, rng, article_count):
+    conn.execute(select(Article.id, Article.title, Article.state)
+                 .order_by(Article.timestamp.desc())
+                 .limit(6).offset(rng.randint(0, max(0, article_count - 6)))).all()
+    conn.execute(select(func.count()).select_from(Comment)
+                 .where(Comment.article_id == rng.randint(1, article_count))).scalar()
+
+
+def _write(conn, rng, article_count):
+    conn.execute(Comment.__table__.insert(), {
+        'body': 'Benchmark comment',
+        'timestamp': datetime.utcnow(),
+        'user_id': 1,
+        'article_id': rng.randint(1, article_count),
+    })
+
+
+def _worker(role, uri, tuned, duration, article_count, seed, results):
+    engine = _make_engine(uri, tuned)
+    rng = random.Random(seed)
+    operation = _write if role == 'writer' else _read
+    samples, errors = [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                operation(conn, rng, article_count)
+        except OperationalError:
+            errors += 1
+            continue
+        samples.append(time.perf_counter() - start)
+    engine.dispose()
+    results.put((role, samples, errors))
+
+
+def run_profile(uri, tuned, readers, writers, duration, article_count, seed=42):
+    results = multiprocessing.Queue()
+    processes = []
+    for i, role in enumerate(['reader'] * readers + ['writer'] * writers):
+        process = multiprocessing.Process(
+            target=_worker, args=(role, uri, tuned, duration, article_count, seed + i, results))
+        process.start()
+        processes.append(process)
+    collected = {'reader': ([], 0), 'writer': ([], 0)}
+    for _ in processes:
+        role, samples, errors = results.get()
+        previous_samples, previous_errors = collected[role]
+        collected[role] = (previous_samples + samples, previous_errors + errors)
+    for process in processes:
+        process.join()
+
+    report = {}
+    for role, (samples, errors) in collected.items():
+        if not readers and role == 'reader' or not writers and role == 'writer':
+            continue
+        report[role] = {
+            'ops_per_sec': round(len(samples) / duration, 2),
+            'locked_errors': errors,
+            'latency': summarize(samples) if samples else None,
+        }
+    return report
+
+
+def _sqlite_copy(source, target, journal_mode):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    # Checkpoint the source so the copy contains every committed page
+    with sqlite3.connect(source) as conn:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    shutil.copyfile(source, target)
+    with sqlite3.connect(target) as conn:
+        conn.execute(f'PRAGMA journal_mode={journal_mode}')
+
+
+def run(database_path=None, database_url=None, readers=8, writers=4, duration=5.0, article_count=1000):
+    """Compare default and tuned profiles on SQLite, or measure the tuned profile on a server database"""
+    if database_url and not db_profile.is_sqlite(database_url):
+        return {'tuned': run_profile(database_url, True, readers, writers, duration, article_count)}
+
+    results = {}
+    for name, tuned, journal_mode in (('default', False, 'DELETE'), ('tuned', True, 'WAL')):
+        copy = f'{database_path}.{name}'
+        _sqlite_copy(database_path, copy, journal_mode)
+        results[name] = run_profile(f'sqlite:///{copy}', tuned, readers, writers, duration, article_count)
+    return results
@@ -0,0 +1,166 @@
+"""Deterministic synthetic heritage catalogue generator"""
+import random
+from datetime import datetime, timedelta
+
+from models import db, User, Article, Comment
+
+# (state, population in millions, approximate centroid, districts)
+STATES = [
+    ('Uttar Pradesh', 200, (26.8, 80.9), ['Lucknow', 'Varanasi', 'Agra', 'Prayagraj', 'Ayodhya', 'Mathura']),
+    ('Maharashtra', 112, (19.7, 75.7), ['Pune', 'Nashik', 'Aurangabad', 'Kolhapur', 'Ratnagiri']),
+    ('Bihar', 104, (25.1, 85.3), ['Patna', 'Gaya', 'Nalanda', 'Vaishali']),
+    ('West Bengal', 91, (22.9, 87.8), ['Kolkata', 'Bankura', 'Murshidabad', 'Darjeeling']),
+    ('Madhya Pradesh', 73, (23.5, 77.9), ['Bhopal', 'Gwalior', 'Chhatarpur', 'Ujjain', 'Mandla']),
+    ('Tamil Nadu', 72, (11.1, 78.6), ['Thanjavur', 'Madurai', 'Kanchipuram', 'Chengalpattu', 'Tiruchirappalli']),
+    ('Rajasthan', 69, (27.0, 74.2), ['Jaipur', 'Jodhpur', 'Udaipur', 'Jaisalmer', 'Bikaner']),
+    ('Karnataka', 61, (15.3, 75.7), ['Mysuru', 'Hassan', 'Vijayanagara', 'Bagalkot', 'Udupi']),
+    ('Gujarat', 60, (22.3, 71.2), ['Ahmedabad', 'Kutch', 'Mehsana', 'Junagadh']),
+    ('Andhra Pradesh', 49, (15.9, 79.7), ['Guntur', 'Chittoor', 'Anantapur', 'Srikakulam']),
+    ('Odisha', 42, (20.9, 85.1), ['Puri', 'Khordha', 'Ganjam', 'Mayurbhanj']),
+    ('Telangana', 35, (18.1, 79.0), ['Mulugu', 'Warangal', 'Hyderabad', 'Nalgonda']),
+    ('Kerala', 33, (10.8, 76.3), ['Kannur', 'Thrissur', 'Kottayam', 'Alappuzha', 'Kasaragod']),
+    ('Assam', 31, (26.2, 92.9), ['Kamrup', 'Sivasagar', 'Majuli', 'Jorhat']),
+    ('Punjab', 28, (31.1, 75.3), ['Amritsar', 'Patiala', 'Bathinda']),
+    ('Himachal Pradesh', 7, (31.1, 77.2), ['Kullu', 'Chamba', 'Kangra', 'Kinnaur']),
+    ('Goa', 1.5, (15.3, 74.1), ['North Goa', 'South Goa']),
+]
+
+VILLAGES_PER_DISTRICT = 60
+SYLLABLES = ['pal', 'am', 'pet', 'kul', 'ch', 'aram', 'kan', 'da', 'nar', 'ko', 'pur', 'gaon',
+             'ha', 'lli', 'vad', 'ur', 'bad', 'ga', 'ri', 'ma', 'na', 'thi', 'ru', 'vel']
+SITE_TYPES = ['Temple', 'Step Well', 'Fort', 'Theyyam Shrine', 'Stupa', 'Palace', 'Mosque',
+              'Church', 'Haveli', 'Rock Art Site', 'Sacred Grove', 'Market Square']
+ADJECTIVES = ['Ancient', 'Forgotten', 'Sacred', 'Royal', 'Hidden', 'Painted', 'Ruined', 'Living']
+SENTENCES = [
+    'Local elders recall festivals that drew pilgrims from neighbouring districts.',
+    'The carvings on the pillars depict scenes from the Ramayana and Mahabharata.',
+    'During the monsoon the courtyard fills with water and reflects the sanctum.',
+    'Inscriptions in old Kannada and Telugu record grants made by the ruling dynasty.',
+    'The annual ritual performance is held after the harvest, usually in February.',
+    'Villagers maintain the site through a trust that collects contributions each year.',
+    'Restoration work in the 1980s replaced part of the outer wall with new stone.',
+    'Travellers can reach the site by bus from the district headquarters.',
+    'Oral histories describe a drought during which the well never ran dry.',
+    'The architecture combines regional styles with influences from distant trade routes.',
+]
+COMMENTS = [
+    'Visited last winter, absolutely beautiful!',
+    'My grandmother used to tell stories about this place.',
+    'Is there an entry fee for visitors?',
+    'Thanks for documenting this, very few people know about it.',
+    'The festival is worth seeing at least once.',
+    'Please add more photos of the carvings.',
+]
+PASSWORD_HASH = 'pbkdf2:sha256:260000$benchmark$' + '0' * 64
+
+
+def _zipf_cum_weights(n, exponent=1.0):
+    total = 0.0
+    cum = []
+    for rank in range(1, n + 1):
+        total += 1.0 / rank ** exponent
+        cum.append(total)
+    return cum
+
+
+def _village_names(rng, count):
+    names = set()
+    while len(names) < count:
+        parts = rng.choices(SYLLABLES, k=rng.randint(2, 4))
+        names.add(''.join(parts).capitalize())
+    return sorted(names)
+
+
+def build_geography(seed):
+    """Return [(state, centroid, district, villages, village_cum_weights)] with state weights"""
+    rng = random.Random(seed)
+    places, weights = [], []
+    for state, population, centroid, districts in STATES:
+        for district in districts:
+            villages = _village_names(rng, VILLAGES_PER_DISTRICT)
+            places.append((state, centroid, district, villages, _zipf_cum_weights(len(villages))))
+            weights.append(population / len(districts))
+    return places, weights
+
+
+def _description(rng):
+    paragraphs = []
+    for _ in range(rng.randint(1, 6)):
+        paragraphs.append(' '.join(rng.choices(SENTENCES, k=rng.randint(2, 6))))
+    return '\n\n'.join(paragraphs)
+
+
+def iter_articles(count, users, seed, base_time, images=()):
+    rng = random.Random(seed)
+    places, weights = build_geography(seed)
+    author_weights = _zipf_cum_weights(users, 0.8)
+    timestamp = base_time
+    for i in range(count):
+        state, (lat, lon), district, villages, village_weights = rng.choices(places, weights=weights)[0]
+        village = rng.choices(villages, cum_weights=village_weights)[0]
+        timestamp += timedelta(seconds=rng.randint(60, 3600))
+        has_coords = rng.random() < 0.8
+        yield {
+            'id': i + 1,
+            'title': f'{rng.choice(ADJECTIVES)} {rng.choice(SITE_TYPES)} of {village}'[:100],
+            'description': _description(rng),
+            'image_path': rng.choice(images) if images and rng.random() < 0.6 else None,
+            'state': state,
+            'district': district,
+            'village': village,
+            'address': f'Near bus stand, {village}' if rng.random() < 0.3 else None,
+            'latitude': round(lat + rng.uniform(-1.5, 1.5), 6) if has_coords else None,
+            'longitude': round(lon + rng.uniform(-1.5, 1.5), 6) if has_coords else None,
+            'timestamp': timestamp,
+            'user_id': rng.choices(range(1, users + 1), cum_weights=author_weights)[0],
+        }
+
+
+def iter_comments(count, articles, users, seed, base_time, batch_size):
+    rng = random.Random(seed + 1)
+    # A few articles attract most of the discussion
+    article_weights = _zipf_cum_weights(articles, 0.9)
+    article_ids = range(1, articles + 1)
+    produced = 0
+    while produced < count:
+        n = min(batch_size, count - produced)
+        targets = rng.choices(article_ids, cum_weights=article_weights, k=n)
+        for article_id in targets:
+            produced += 1
+            yield {
+                'id': produced,
+                'body': rng.choice(COMMENTS),
+                'timestamp': base_time + timedelta(minutes=30 * article_id + rng.randint(1, 100000)),
+                'user_id': rng.randint(1, users),
+                'article_id': article_id,
+            }
+
+
+def _insert_batches(table, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(table.insert(), batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+
+
+def generate(articles=100000, comments=1000000, users=None, seed=42, batch_size=10000, images=()):
+    """Populate the current app's database. Must be called inside an app context."""
+    users = users or max(10, articles // 20)
+    base_time = datetime(2020, 1, 1)
+    db.create_all()
+    _insert_batches(User.__table__, ({
+        'id': i,
+        'username': f'user{i}',
+        'email': f'user{i}@example.com',
+        'password_hash': PASSWORD_HASH,
+    } for i in range(1, users + 1)), batch_size)
+    _insert_batches(Article.__table__, iter_articles(articles, users, seed, base_time, images), batch_size)
+    _insert_batches(Comment.__table__,
+                    iter_comments(comments, articles, users, seed, base_time, batch_size), batch_size)
+    return {'articles': articles, 'comments': comments, 'users': users, 'seed': seed}
@@ -0,0 +1,92 @@
+"""In-process concurrent load driver with a weighted mix of page and AJAX requests"""
+import itertools
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.micro import summarize
+
+# (name, weight, method, path or path factory, json body)
+DEFAULT_MIX = [
+    ('index', 30, 'GET', '/', None),
+    ('index_page', 10, 'GET', lambda rng, n: f'/?page={rng.randint(1, 20)}', None),
+    ('view_article', 25, 'GET', lambda rng, n: f'/article/{rng.randint(1, min(n, 1000))}', None),
+    ('search', 10, 'GET', '/search?query=temple', None),
+    ('api_search', 10, 'GET', '/api/search?query=fort', None),
+    ('translate', 5, 'POST', '/translate',
+     {'texts': ['The carvings on the pillars depict scenes from the Ramayana.'], 'target_lang': 'hi'}),
+    ('geocode', 5, 'GET', '/geocode?location=Palampet', None),
+    ('reverse_geocode', 5, 'GET', '/api/reverse_geocode?lat=18.25&lon=79.94', None),
+]
+
+
+def _worker(app, mix, weights, article_count, deadline, seed, results, lock, user_id):
+    rng = random.Random(seed)
+    client = app.test_client()
+    if user_id is not None:
+        # Same session cookie Flask-Login sets on login
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+    local = defaultdict(list)
+    errors = defaultdict(int)
+    while time.perf_counter() < deadline:
+        name, _, method, path, body = rng.choices(mix, weights=weights)[0]
+        if callable(path):
+            path = path(rng, article_count)
+        start = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        local[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors[name] += 1
+    with lock:
+        for name, samples in local.items():
+            results['samples'][name].extend(samples)
+        for name, count in errors.items():
+            results['errors'][name] += count
+
+
+def run(app, concurrency=8, duration=10.0, article_count=1000, seed=42, mix=None, user_id=None):
+    """Drive the mix from `concurrency` threads; user_id sends every request as that logged-in user"""
+    from sqlalchemy import event
+    from models import db
+
+    mix = mix or DEFAULT_MIX
+    weights = [entry[1] for entry in mix]
+    results = {'samples': defaultdict(list), 'errors': defaultdict(int)}
+    lock = threading.Lock()
+    statements = itertools.count()
+    count_statement = lambda *args: next(statements)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    start = time.perf_counter()
+    deadline = start + duration
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(_worker, app, mix, weights, article_count, deadline, seed + i,
+                                   results, lock, user_id)
+                       for i in range(concurrency)]
+            for future in futures:
+                future.result()
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+    elapsed = time.perf_counter() - start
+    sql_statements = next(statements)
+
+    total = sum(len(samples) for samples in results['samples'].values())
+    everything = [s for samples in results['samples'].values() for s in samples]
+    return {
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2),
+        'logged_in': user_id is not None,
+        'sql_statements': sql_statements,
+        'sql_per_request': round(sql_statements / total, 3) if total else None,
+        'errors': dict(results['errors']),
+        'overall': summarize(everything) if everything else None,
+        'endpoints': {name: summarize(samples) for name, samples in sorted(results['samples'].items())},
+    }
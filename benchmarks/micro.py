@@ -0,0 +1,74 @@
+"""Micro-benchmarks for the hot page routes and template helpers"""
+import statistics
+import time
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'ops_per_sec': round(len(ordered) / sum(ordered), 2) if sum(ordered) else None,
+    }
+
+
+def measure(fn, repeat, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def _get(client, path):
+    def call():
+        response = client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f'{path} returned {response.status_code}')
+    return call
+
+
+def _uncached(call):
+    """Time the query itself: with the result cache every repeat after the first would be a hit"""
+    from search_cache import search_cache
+
+    def uncached_call():
+        enabled, search_cache.enabled = search_cache.enabled, False
+        try:
+            call()
+        finally:
+            search_cache.enabled = enabled
+    return uncached_call
+
+
+def run(app, repeat=50):
+    from app import better_nl2br
+    from models import Article
+
+    client = app.test_client()
+    with app.app_context():
+        # Article 1 is the most commented one in the synthetic data set
+        sample = Article.query.get(1)
+        state, district, article_id = sample.state, sample.district, sample.id
+        long_text = '\n'.join(a.description for a in Article.query.limit(20))
+
+    cases = {
+        'index': _get(client, '/'),
+        'index_filtered': _get(client, f'/?state={state}&district={district}'),
+        'index_deep_page': _get(client, '/?page=50'),
+        'search': _uncached(_get(client, '/search?query=temple')),
+        'search_location': _uncached(_get(client, f'/search?query={district}')),
+        'api_search': _uncached(_get(client, '/api/search?query=temple')),
+        'search_cached': _get(client, '/search?query=temple'),
+        'api_search_cached': _get(client, '/api/search?query=temple'),
+        'view_article': _get(client, f'/article/{article_id}'),
+        'better_nl2br': lambda: better_nl2br(long_text),
+    }
+    return {name: measure(fn, repeat) for name, fn in cases.items()}
@@ -0,0 +1,237 @@
+"""
+Outbound capacity benchmark.
+
+A local HTTP server stands in for Nominatim and answers every request after a
+fixed delay. gunicorn is started once per worker profile (gunicorn.conf.py)
+with NOMINATIM_URL pointing at it, and a pool of client threads keeps
+/geocode busy. With the sync profile a worker is stuck for the whole delay,
+so throughput is capped at workers / delay; the io profile keeps one call in
+flight per thread.
+
+/translate batches are measured in-process with the stub translator, since
+deep_translator's endpoint cannot be redirected: a batch of N texts should
+take about one stub delay, not N. The same stub counts how much text goes
+back to the translator after a one-sentence edit of a long description.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.micro import summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+
+
+class SlowNominatim(BaseHTTPRequestHandler):
+    """Answers /search and /reverse like Nominatim after `server.delay` seconds"""
+
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        address = {'state': 'Telangana', 'county': 'Mulugu', 'village': 'Palampet'}
+        if self.path.startswith('/reverse'):
+            payload = {'lat': '18.2594', 'lon': '79.9433', 'address': address}
+        else:
+            payload = [{'lat': '18.2594', 'lon': '79.9433', 'address': address}]
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(delay):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowNominatim)
+    server.daemon_threads = True
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.1)
+    raise RuntimeError(f'gunicorn did not come up at {url}')
+
+
+def drive(url, concurrency, duration):
+    """Keep `concurrency` requests to url in flight for `duration` seconds"""
+    samples, errors = [], []
+    statuses = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=60) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                status = 'connection_error'
+            with lock:
+                statuses[status] += 1
+                (samples if status == 200 else errors).append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Requests already queued at the deadline still finish, so divide by the real elapsed time
+    elapsed = time.perf_counter() - started
+    return {
+        'throughput_rps': round(len(samples) / elapsed, 2),
+        'errors': len(errors),
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'latency': summarize(samples) if samples else None,
+    }
+
+
+@contextmanager
+def gunicorn_server(profile, workers, threads, **env_overrides):
+    """Run gunicorn with gunicorn.conf.py on a free port and yield its base URL"""
+    port = _free_port()
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(DATA_DIR, 'outbound.db')}")
+    env.setdefault('METRICS_DIR', os.path.join(DATA_DIR, 'metrics'))
+    env.update({
+        'GUNICORN_PROFILE': profile,
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'GUNICORN_THREADS': str(threads),
+        'WEB_CONCURRENCY': str(workers),
+        'SLOW_REQUEST_THRESHOLD': '0',
+        'QUERY_BUDGET_SAMPLE_RATE': '0',
+    })
+    env.update(env_overrides)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f'http://127.0.0.1:{port}'
+        _wait_until_up(f'{base}/languages')
+        yield base
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run_profile(profile, stub_url, workers, threads, concurrency, duration):
+    # Raw worker capacity; admission control would cap /geocode on purpose (see shedding.py)
+    with gunicorn_server(profile, workers, threads, NOMINATIM_URL=stub_url, ADMISSION_ENABLED='0') as base:
+        return drive(f'{base}/geocode?location=Palampet', concurrency, duration)
+
+
+def _translate_app(delay):
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(DATA_DIR, 'outbound.db')}")
+    os.environ.setdefault('METRICS_DIR', os.path.join(DATA_DIR, 'metrics'))
+    from app import create_app
+    from benchmarks import stubs
+    from models import SegmentTranslation, db
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    stubs.install(latency=delay)
+    with app.app_context():
+        db.create_all()
+        SegmentTranslation.query.delete()
+        db.session.commit()
+    return app
+
+
+def translate_batch(batch_size, delay, repeat=5):
+    """Latency of one /translate call with batch_size texts and a stub translator"""
+    app = _translate_app(delay)
+    app.config['TRANSLATION_MEMORY_ENABLED'] = False
+    client = app.test_client()
+    payload = {'texts': [f'Sentence number {i}.' for i in range(batch_size)], 'target_lang': 'hi'}
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.post('/translate', json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f'/translate returned {response.status_code}')
+        samples.append(time.perf_counter() - start)
+    return {'batch_size': batch_size, 'sequential_ms': round(batch_size * delay * 1000, 3),
+            'latency': summarize(samples)}
+
+
+def retranslate_edit(sentences, delay):
+    """
+    Translate an article description, fix a typo in one sentence and translate
+    it again, with and without the translation memory. Reports translator calls,
+    characters sent and latency of the second request.
+    """
+    from app import better_nl2br
+    from benchmarks.stubs import StubTranslator
+
+    app = _translate_app(delay)
+    client = app.test_client()
+    lines = [f'The temple at site {i} was built in the {i % 9 + 10}th century. '
+             f'Its pillars are carved with scenes from the epics.' for i in range(sentences // 2)]
+    original = '\n'.join(lines)
+    edited = original.replace('site 3 was built', 'site 3 was rebuilt', 1)
+
+    def translate(text):
+        StubTranslator.reset_counters()
+        start = time.perf_counter()
+        response = client.post('/translate', json={'texts': [better_nl2br(text)], 'target_lang': 'hi'})
+        if response.status_code != 200:
+            raise RuntimeError(f'/translate returned {response.status_code}')
+        return {'translator_calls': StubTranslator.calls, 'characters_sent': StubTranslator.characters,
+                'latency_ms': round((time.perf_counter() - start) * 1000, 3)}
+
+    results = {'sentences': sentences}
+    for name, enabled in (('whole_text', False), ('translation_memory', True)):
+        app.config['TRANSLATION_MEMORY_ENABLED'] = enabled
+        results[name] = {'first': translate(original), 'after_edit': translate(edited)}
+    return results
+
+
+def run(delay=0.2, workers=2, threads=32, concurrency=64, duration=5.0, batch_size=10, sentences=40):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    stub = start_stub_server(delay)
+    stub_url = f'http://127.0.0.1:{stub.server_address[1]}'
+    try:
+        results = {
+            'stub_delay_s': delay,
+            'workers': workers,
+            'concurrency': concurrency,
+            'geocode': {
+                'sync': run_profile('sync', stub_url, workers, 1, concurrency, duration),
+                'io': run_profile('io', stub_url, workers, threads, concurrency, duration),
+            },
+        }
+    finally:
+        stub.shutdown()
+    results['translate'] = translate_batch(batch_size, delay)
+    results['retranslate_edit'] = retranslate_edit(sentences, delay)
+    return results
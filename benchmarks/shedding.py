@@ -0,0 +1,50 @@
+"""
+Load-shedding benchmark.
+
+One gthread worker serves the benchmark database while a crowd of clients
+floods /api/reverse_geocode (backed by the slow stub Nominatim) and a few
+clients keep requesting index and article pages. It runs once with admission
+control disabled and once enabled, reporting page latency and the status
+codes each side received.
+"""
+import threading
+
+from benchmarks.outbound import drive, gunicorn_server, start_stub_server
+
+
+def run_case(admission_enabled, stub_url, threads, flood, pages, duration):
+    with gunicorn_server('io', 1, threads, NOMINATIM_URL=stub_url,
+                         ADMISSION_ENABLED='1' if admission_enabled else '0') as base:
+        targets = {
+            'reverse_geocode': (f'{base}/api/reverse_geocode?lat=18.25&lon=79.94', flood),
+            'index': (f'{base}/', pages),
+            'view_article': (f'{base}/article/1', pages),
+        }
+        results = {}
+
+        def drive_target(name):
+            url, concurrency = targets[name]
+            results[name] = drive(url, concurrency, duration)
+
+        drivers = [threading.Thread(target=drive_target, args=(name,)) for name in targets]
+        for driver in drivers:
+            driver.start()
+        for driver in drivers:
+            driver.join()
+        return results
+
+
+def run(delay=0.5, threads=16, flood=64, pages=2, duration=5.0):
+    stub = start_stub_server(delay)
+    stub_url = f'http://127.0.0.1:{stub.server_address[1]}'
+    try:
+        return {
+            'stub_delay_s': delay,
+            'threads': threads,
+            'flood_clients': flood,
+            'page_clients': pages,
+            'admission_off': run_case(False, stub_url, threads, flood, pages, duration),
+            'admission_on': run_case(True, stub_url, threads, flood, pages, duration),
+        }
+    finally:
+        stub.shutdown()
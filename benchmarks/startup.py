@@ -0,0 +1,102 @@
+"""
+Cold start and per-worker memory benchmark.
+
+Each measurement runs in a fresh interpreter so module caches are cold:
+import time of app.py, create_app() time, first request time, the slowest
+imports reported by ``-X importtime``, and the memory of a worker forked from
+a preloaded parent the way gunicorn --preload does it (RSS plus the private,
+non-shared part).
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r'''
+import json, os, sys, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+app = app_module.create_app()
+t2 = time.perf_counter()
+from models import db
+with app.app_context():
+    db.create_all()
+t3 = time.perf_counter()
+app.test_client().get('/')
+t4 = time.perf_counter()
+
+def memory(pid):
+    """RSS and private (unshared) memory in KiB from /proc, None where unavailable"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return {'rss_kib': None, 'private_kib': None}
+    kib = lambda name: int(fields.get(name, '0 kB').split()[0])
+    return {'rss_kib': kib('Rss'), 'private_kib': kib('Private_Clean') + kib('Private_Dirty')}
+
+parent = memory(os.getpid())
+read_end, write_end = os.pipe()
+pid = os.fork()
+if pid == 0:
+    os.close(read_end)
+    app.test_client().get('/')
+    os.write(write_end, json.dumps(memory(os.getpid())).encode())
+    os._exit(0)
+os.close(write_end)
+child = json.loads(os.read(read_end, 65536))
+os.waitpid(pid, 0)
+print(json.dumps({
+    'import_s': t1 - t0,
+    'create_app_s': t2 - t1,
+    'first_request_s': t4 - t3,
+    'parent_memory': parent,
+    'worker_memory': child,
+}))
+'''
+
+
+def _probe(env):
+    output = subprocess.check_output([sys.executable, '-c', PROBE], cwd=ROOT, env=env, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _slowest_imports(env, limit=10):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    direct = []
+    for line in result.stderr.splitlines():
+        fields = line[len('import time:'):].split('|')
+        if not line.startswith('import time:') or len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_us, cumulative_us, name = fields
+        # Keep what app.py imports directly; deeper imports are part of their parent's cumulative time
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth != 1:
+            continue
+        direct.append({'module': name.strip(), 'cumulative_ms': int(cumulative_us) / 1000,
+                          'self_ms': int(self_us) / 1000})
+    return sorted(direct, key=lambda entry: entry['cumulative_ms'], reverse=True)[:limit]
+
+
+def run(runs=5, env=None):
+    env = dict(os.environ if env is None else env)
+    # Never touch the real database; the probe creates an empty schema here
+    data_dir = os.path.join(ROOT, 'benchmarks', 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(data_dir, 'startup.db')}")
+    env.setdefault('METRICS_DIR', os.path.join(data_dir, 'metrics'))
+    samples = [_probe(env) for _ in range(runs)]
+    median = lambda key: sorted(sample[key] for sample in samples)[len(samples) // 2]
+    return {
+        'runs': runs,
+        'import_ms': round(median('import_s') * 1000, 2),
+        'create_app_ms': round(median('create_app_s') * 1000, 2),
+        'first_request_ms': round(median('first_request_s') * 1000, 2),
+        'parent_memory': samples[-1]['parent_memory'],
+        'worker_memory': samples[-1]['worker_memory'],
+        'slowest_imports': _slowest_imports(env),
+    }
@@ -0,0 +1,49 @@
+"""In-process stand-ins for the translator and Nominatim so benchmarks run offline"""
+import threading
+import time
+
+
+class StubTranslator:
+    """Mimics deep_translator.GoogleTranslator with a fixed simulated latency, counting the traffic"""
+
+    latency = 0.0
+    calls = 0
+    characters = 0
+    _lock = threading.Lock()
+
+    def __init__(self, source='auto', target='en'):
+        self.source = source
+        self.target = target
+
+    def translate(self, text):
+        with self._lock:
+            StubTranslator.calls += 1
+            StubTranslator.characters += len(text)
+        time.sleep(self.latency)
+        return f'[{self.target}] {text}'
+
+    @classmethod
+    def reset_counters(cls):
+        with cls._lock:
+            cls.calls = 0
+            cls.characters = 0
+
+
+def stub_nominatim(latency):
+    """Replacement for clients.nominatim returning a fixed place after `latency` seconds"""
+    def nominatim(path, params, timeout=10):
+        time.sleep(latency)
+        address = {'state': 'Telangana', 'county': 'Mulugu', 'village': 'Palampet'}
+        if path == 'reverse':
+            return {'lat': params['lat'], 'lon': params['lon'], 'address': address}
+        return [{'lat': '18.2594', 'lon': '79.9433', 'address': address}]
+    return nominatim
+
+
+def install(latency=0.0):
+    """Patch the app's outbound clients with stubs adding `latency` seconds per call"""
+    import clients
+
+    StubTranslator.latency = latency
+    clients.translate = lambda text, target, source='auto': StubTranslator(source, target).translate(text)
+    clients.nominatim = stub_nominatim(latency)
@@ -0,0 +1,78 @@
+"""
+Outbound clients for translation and geocoding.
+
+`requests` and `deep_translator` are imported on first use instead of at app
+import, which keeps worker boot and test startup fast. The HTTP session and
+the outbound thread pool are created lazily in each process, so neither is
+shared across a gunicorn fork.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+NOMINATIM_URL = os.environ.get('NOMINATIM_URL', 'https://nominatim.openstreetmap.org')
+USER_AGENT = 'TimelessEchoes/1.0'
+OUTBOUND_MAX_WORKERS = int(os.environ.get('OUTBOUND_MAX_WORKERS', 32))
+
+_session = None
+_session_pid = None
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def http_session():
+    """Per-process requests.Session reusing connections to Nominatim"""
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        import requests
+        _session = requests.Session()
+        _session.headers['User-Agent'] = USER_AGENT
+        # Every request thread may hold a connection at once; the default pool keeps only 10
+        pool_size = max(OUTBOUND_MAX_WORKERS, int(os.environ.get('GUNICORN_THREADS', 1)))
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+        _session_pid = os.getpid()
+    return _session
+
+
+def nominatim(path, params, timeout=10):
+    """GET a Nominatim endpoint ('search' or 'reverse') and return the decoded JSON"""
+    response = http_session().get(f'{NOMINATIM_URL}/{path}', params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def outbound_pool():
+    """Per-process thread pool that keeps many slow outbound calls in flight at once"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ThreadPoolExecutor(max_workers=OUTBOUND_MAX_WORKERS,
+                                           thread_name_prefix='outbound')
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def map_outbound(fn, items):
+    """
+    Run fn over items concurrently on the outbound pool. Returns a list of
+    (result, exception) pairs in input order, so callers decide how to report
+    a partial failure.
+    """
+    futures = [outbound_pool().submit(fn, item) for item in items]
+    results = []
+    for future in futures:
+        try:
+            results.append((future.result(), None))
+        except Exception as e:
+            results.append((None, e))
+    return results
+
+
+def translate(text, target, source='auto'):
+    """Translate text with Google Translate via deep_translator"""
+    from deep_translator import GoogleTranslator
+    return GoogleTranslator(source=source, target=target).translate(text)
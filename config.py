@@ -1,10 +1,78 @@
 import os
+import tempfile
 from datetime import timedelta
 
+from db_profile import database_uri, engine_options, sqlite_pragmas
+
 class Config:
     SECRET_KEY = 'dev-key-change-in-production'
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///timeless_echoes.db'
+    SQLALCHEMY_DATABASE_URI = database_uri()
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLITE_PRAGMAS = sqlite_pragmas()  # applied on connect by db_profile.init_app
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max-limit
-    PERMANENT_SESSION_LIFETIME = timedelta(days=7)
\ No newline at end of file
+    PERMANENT_SESSION_LIFETIME = timedelta(days=7)
+    JINJA_BYTECODE_CACHE = os.environ.get('JINJA_BYTECODE_CACHE', '1') == '1'
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR')  # unset: Jinja's private per-user dir
+
+    # Performance instrumentation (see metrics.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'timeless_echoes_metrics'))
+    METRICS_FLUSH_INTERVAL = 1.0  # seconds between per-worker snapshot writes
+    SLOW_REQUEST_THRESHOLD = float(os.environ.get('SLOW_REQUEST_THRESHOLD', '1.0'))  # seconds, 0 disables
+    SLOW_REQUEST_SAMPLE_INTERVAL = 0.01  # seconds between stack samples of slow requests
+
+    # Query budgets per endpoint (see query_budget.py); an int is a max query count
+    QUERY_BUDGETS = {
+        'main.index': {'max_queries': 6},
+        'main.search': {'max_queries': 4},
+        'main.api_search': {'max_queries': 3},
+        'main.view_article': {'max_queries': 8},
+        'main.profile': {'max_queries': 4},
+    }
+    QUERY_BUDGET_MAX_REPEATS = 3  # same statement shape more often than this is flagged as N+1
+    QUERY_BUDGET_SAMPLE_RATE = float(os.environ.get('QUERY_BUDGET_SAMPLE_RATE', '0.01'))
+    QUERY_BUDGET_ENFORCE = os.environ.get('QUERY_BUDGET_ENFORCE', '0') == '1'  # raise instead of log
+
+    # Identity cache for the Flask-Login user_loader (user_cache.py)
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '600'))  # seconds, 0 disables
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '1024'))
+
+    # Search result cache (search_cache.py)
+    SEARCH_CACHE_ENABLED = os.environ.get('SEARCH_CACHE_ENABLED', '1') == '1'
+    SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get('SEARCH_CACHE_MAX_ENTRIES', '4096'))
+    SEARCH_CACHE_MAX_BYTES = int(os.environ.get('SEARCH_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+    SEARCH_CACHE_TTL = float(os.environ.get('SEARCH_CACHE_TTL', '3600'))  # seconds; fallback when the bus is down
+
+    # Admission control (admission.py): per-worker concurrency limit, queue length and queue wait
+    # per endpoint. 'low' priority endpoints also share ADMISSION_AJAX_CONCURRENCY slots
+    # (0: three quarters of GUNICORN_THREADS when set), leaving the rest for page routes.
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', '1') == '1'
+    ADMISSION_LIMITS = {
+        'api.translate_text': {'concurrency': 4, 'queue': 4, 'timeout': 5.0, 'retry_after': 5},
+        'api.geocode': {'concurrency': 8, 'queue': 4, 'timeout': 1.0},
+        'api.reverse_geocode': {'concurrency': 8, 'queue': 4, 'timeout': 1.0},
+        'main.api_search': {'concurrency': 8, 'queue': 8, 'timeout': 0.5},
+        # A full export streams for seconds and holds its slot until the last byte is sent
+        'main.export_articles': {'concurrency': 1, 'retry_after': 30},
+    }
+    ADMISSION_AJAX_CONCURRENCY = int(os.environ.get('ADMISSION_AJAX_CONCURRENCY', '0'))
+
+    # Cross-worker cache invalidation (invalidation.py)
+    INVALIDATION_ENABLED = os.environ.get('INVALIDATION_ENABLED', '1') == '1'
+    INVALIDATION_POLL_INTERVAL = float(os.environ.get('INVALIDATION_POLL_INTERVAL', '1.0'))  # seconds
+
+    # Store translations per sentence so edits only retranslate changed sentences (translation_memory.py)
+    TRANSLATION_MEMORY_ENABLED = os.environ.get('TRANSLATION_MEMORY_ENABLED', '1') == '1'
+    # Longer segments are translated but not stored; prune old rows with `flask prune-translations`
+    TRANSLATION_MEMORY_MAX_SEGMENT = int(os.environ.get('TRANSLATION_MEMORY_MAX_SEGMENT', '1000'))  # characters
+    # /translate rejects larger batches before reaching the memory or the translator
+    TRANSLATE_MAX_TEXTS = int(os.environ.get('TRANSLATE_MAX_TEXTS', '50'))
+    TRANSLATE_MAX_CHARS = int(os.environ.get('TRANSLATE_MAX_CHARS', '20000'))
+
+    # Coalesce comment inserts from concurrent requests into one transaction (group_commit.py)
+    GROUP_COMMIT_ENABLED = os.environ.get('GROUP_COMMIT_ENABLED', '0') == '1'
+    GROUP_COMMIT_WINDOW = float(os.environ.get('GROUP_COMMIT_WINDOW', '0.002'))  # seconds to gather a batch
+    GROUP_COMMIT_MAX_BATCH = int(os.environ.get('GROUP_COMMIT_MAX_BATCH', '64'))
+    GROUP_COMMIT_TIMEOUT = float(os.environ.get('GROUP_COMMIT_TIMEOUT', '10'))  # seconds a request waits
@@ -0,0 +1,79 @@
+"""Shared fixtures: the real app from create_app() on a throwaway SQLite database"""
+import pytest
+
+from app import create_app
+from config import Config
+from db_profile import engine_options
+from models import db, User, Article
+from search_cache import search_cache
+from user_cache import user_cache
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    Return a factory building the app with config overrides. Every app gets
+    its own database holding user 1 ('ravi', password 'old-password') and
+    `articles` articles by that user.
+    """
+    apps = []
+
+    def make(articles=0, **overrides):
+        uri = f'sqlite:///{tmp_path}/app{len(apps)}.db'
+        settings = {
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': uri,
+            'SQLALCHEMY_ENGINE_OPTIONS': engine_options(uri),
+            'METRICS_DIR': str(tmp_path / 'metrics'),
+            'JINJA_BYTECODE_CACHE': False,
+            'SLOW_REQUEST_THRESHOLD': 0,
+            'QUERY_BUDGET_SAMPLE_RATE': 0.0,
+        }
+        settings.update(overrides)
+        app = create_app(type('TestConfig', (Config,), settings))
+        with app.app_context():
+            db.create_all()
+            user = User(username='ravi', email='ravi@example.com')
+            user.set_password('old-password')
+            db.session.add(user)
+            for i in range(articles):
+                db.session.add(Article(title=f'Temple {i}', description=f'A heritage site, number {i}',
+                                       state='Telangana', district='Mulugu', village='Palampet',
+                                       author=user))
+            db.session.commit()
+        # The caches are per process; drop rows read from another test's database
+        user_cache.clear()
+        search_cache.bump()
+        apps.append(app)
+        return app
+
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(articles=3)
+
+
+def _login(client, user_id=1):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+@pytest.fixture
+def login():
+    """login(client, user_id=1) gives client the session cookie Flask-Login sets on login"""
+    return _login
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user_client(app):
+    return _login(app.test_client())
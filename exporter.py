@@ -0,0 +1,159 @@
+"""
+Streaming bulk export of the article catalogue as JSONL, GeoJSON or CSV.
+
+Rows are fetched in chunks with ``yield_per`` and serialized one at a time,
+so memory stays flat regardless of table size. Used by the /export route and
+the ``flask export-articles`` command. ``since`` restricts the export to
+articles created after the given Article.timestamp for incremental dumps.
+"""
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select
+
+from models import db, User, Article
+
+FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'geojson': 'application/geo+json',
+    'csv': 'text/csv',
+}
+FIELDS = ['id', 'title', 'description', 'image_path', 'state', 'district', 'village',
+          'address', 'latitude', 'longitude', 'timestamp', 'author']
+
+
+def parse_since(value):
+    """Parse an ISO 8601 `since` value, raising ValueError when it is malformed"""
+    return datetime.fromisoformat(value) if value else None
+
+
+def iter_article_rows(since=None, chunk_size=1000, progress=None):
+    """
+    Yield article dicts ordered by timestamp, fetching chunk_size rows at a time.
+    If a progress dict is given, progress['latest'] tracks the last timestamp
+    emitted, which is the `since` value for the next incremental export.
+    """
+    stmt = (
+        select(Article.id, Article.title, Article.description, Article.image_path, Article.state,
+               Article.district, Article.village, Article.address, Article.latitude,
+               Article.longitude, Article.timestamp, User.username.label('author'))
+        .outerjoin(User, Article.user_id == User.id)
+        .order_by(Article.timestamp, Article.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    if since is not None:
+        stmt = stmt.where(Article.timestamp > since)
+    for row in db.session.execute(stmt):
+        record = row._asdict()
+        if record['timestamp'] is not None:
+            if progress is not None:
+                progress['latest'] = record['timestamp']
+            record['timestamp'] = record['timestamp'].isoformat()
+        yield record
+
+
+def jsonl_chunks(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def geojson_chunks(rows):
+    """Stream a FeatureCollection; articles without coordinates are skipped"""
+    yield '{"type": "FeatureCollection", "features": [\n'
+    first = True
+    for row in rows:
+        if row['latitude'] is None or row['longitude'] is None:
+            continue
+        feature = {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [row['longitude'], row['latitude']]},
+            'properties': {k: v for k, v in row.items() if k not in ('latitude', 'longitude')},
+        }
+        yield ('' if first else ',\n') + json.dumps(feature, ensure_ascii=False)
+        first = False
+    yield '\n]}\n'
+
+
+def csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+SERIALIZERS = {'jsonl': jsonl_chunks, 'geojson': geojson_chunks, 'csv': csv_chunks}
+
+
+def gzip_chunks(chunks, flush_size=64 * 1024):
+    """Gzip a stream of text chunks on the fly, emitting roughly flush_size bytes at a time"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pending = []
+    size = 0
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            pending.append(data)
+            size += len(data)
+        if size >= flush_size:
+            yield b''.join(pending)
+            pending, size = [], 0
+    pending.append(compressor.flush())
+    yield b''.join(pending)
+
+
+def encode_chunks(chunks, batch_size=64 * 1024):
+    """Encode text chunks to UTF-8, coalescing small rows into larger writes"""
+    pending = []
+    size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= batch_size:
+            yield ''.join(pending).encode('utf-8')
+            pending, size = [], 0
+    if pending:
+        yield ''.join(pending).encode('utf-8')
+
+
+def export_stream(fmt, since=None, compress=False, chunk_size=1000, progress=None):
+    """Byte chunks of a full or incremental export in the requested format"""
+    chunks = SERIALIZERS[fmt](iter_article_rows(since, chunk_size, progress))
+    return gzip_chunks(chunks) if compress else encode_chunks(chunks)
+
+
+@click.command('export-articles')
+@click.option('--format', 'fmt', type=click.Choice(list(FORMATS)), default='jsonl', show_default=True)
+@click.option('--since', help='Only articles created after this ISO 8601 timestamp.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Defaults to stdout.')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows fetched per round trip.')
+@with_appcontext
+def export_articles_command(fmt, since, output, compress, chunk_size):
+    """Stream all articles (or those created after --since) to a file."""
+    try:
+        since = parse_since(since)
+    except ValueError:
+        raise click.BadParameter('must be an ISO 8601 timestamp', param_hint='--since')
+    progress = {}
+    out = open(output, 'wb') if output else sys.stdout.buffer
+    try:
+        for chunk in export_stream(fmt, since, compress, chunk_size, progress):
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
+    if 'latest' in progress:
+        click.echo(f"Latest article timestamp: {progress['latest'].isoformat()} (use as --since next time)",
+                   err=True)
@@ -0,0 +1,139 @@
+"""
+Group commit for small, independent inserts.
+
+When GROUP_COMMIT_ENABLED is set, request threads hand their row to a
+per-process committer thread and block until it is written. The committer
+takes everything that arrived within GROUP_COMMIT_WINDOW seconds (at most
+GROUP_COMMIT_MAX_BATCH rows) and inserts it in one transaction, so a burst of
+comments costs one lock acquisition and one fsync on SQLite instead of one per
+comment.
+
+Each caller still gets its own outcome: if the batch fails it is retried one
+row per transaction, and submit() raises the error of that caller's row only.
+A submit() still queued after GROUP_COMMIT_TIMEOUT seconds withdraws its row
+and raises GroupCommitTimeout, so a failed request never leaves a comment
+behind to be duplicated by a retry; a row already being written is waited for.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from metrics import metrics
+from models import Comment, db
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitTimeout(TimeoutError):
+    """Raised by submit() when its row was withdrawn unwritten after GROUP_COMMIT_TIMEOUT"""
+
+
+class GroupCommitQueue:
+    """Flask extension coalescing inserts into one table"""
+
+    def __init__(self, table, app=None):
+        self.table = table
+        self.enabled = False
+        self.window = 0.002
+        self.max_batch = 64
+        self.timeout = 10.0
+        self.app = None
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.setdefault('GROUP_COMMIT_ENABLED', False)
+        self.window = float(app.config.setdefault('GROUP_COMMIT_WINDOW', 0.002))
+        self.max_batch = int(app.config.setdefault('GROUP_COMMIT_MAX_BATCH', 64))
+        self.timeout = float(app.config.setdefault('GROUP_COMMIT_TIMEOUT', 10.0))
+        self.app = app
+        self._queue = None  # a new app gets its own committer
+        app.extensions.setdefault('group_commit', {})[self.table.name] = self
+
+    def submit(self, row):
+        """Insert row as part of the next batch; blocks until committed and raises its error"""
+        future = Future()
+        self._ensure_committer().put((row, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:  # not the builtin TimeoutError before Python 3.11
+            if future.cancel():
+                raise GroupCommitTimeout(f'Row not written within {self.timeout}s') from None
+            # The committer took the row before we gave up; its outcome is final
+            return future.result()
+
+    def _ensure_committer(self):
+        # The committer thread does not survive a fork, so every worker starts its own
+        if self._queue is None or self._pid != os.getpid():
+            with self._lock:
+                if self._queue is None or self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                    self._pid = os.getpid()
+                    threading.Thread(target=self._run, args=(self.app, self._queue), daemon=True,
+                                     name=f'group-commit-{self.table.name}').start()
+        return self._queue
+
+    def _run(self, app, pending):
+        with app.app_context():
+            last_size = 0
+            while True:
+                batch = self._next_batch(pending, last_size > 1)
+                if not batch:
+                    continue
+                last_size = len(batch)
+                try:
+                    self._commit(batch)
+                except Exception as e:  # never let the committer die with callers waiting
+                    logger.exception('Group commit of %d rows failed', len(batch))
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                finally:
+                    db.session.remove()
+
+    def _next_batch(self, pending, concurrent):
+        """Rows to write next, without those whose caller already gave up"""
+        batch = []
+        item = pending.get()
+        deadline = time.monotonic() + self.window
+        # Only hold the batch open while writes are arriving concurrently,
+        # so a lone writer is not delayed by the window
+        concurrent = concurrent or not pending.empty()
+        while True:
+            if item[1].set_running_or_notify_cancel():
+                batch.append(item)
+            if len(batch) >= self.max_batch:
+                return batch
+            try:
+                timeout = max(0.0, deadline - time.monotonic()) if concurrent else 0
+                item = pending.get(timeout=timeout)
+            except queue.Empty:
+                return batch
+
+    def _commit(self, batch):
+        try:
+            db.session.execute(self.table.insert(), [row for row, _ in batch])
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Find out whose row broke the batch: retry each on its own
+            for item in batch:
+                self._commit([item])
+            return
+        metrics.store.observe('timeless_group_commit_batch_size', {'table': self.table.name}, len(batch))
+        for _, future in batch:
+            future.set_result(None)
+
+
+comment_writes = GroupCommitQueue(Comment.__table__)
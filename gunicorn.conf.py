@@ -0,0 +1,43 @@
+"""
+Gunicorn settings: gunicorn -c gunicorn.conf.py "app:create_app()"
+
+GUNICORN_PROFILE selects how workers handle slow outbound calls:
+
+    io    (default) gthread workers, GUNICORN_THREADS threads each. A request
+          waiting on Nominatim or the translator holds a thread rather than
+          the whole worker, so one worker keeps many outbound calls in flight.
+    sync  one request per worker, the gunicorn default; kept for comparison.
+
+WEB_CONCURRENCY sets the number of workers and GUNICORN_BIND the address.
+"""
+import multiprocessing
+import os
+
+profile = os.environ.get('GUNICORN_PROFILE', 'io')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+if profile == 'sync':
+    worker_class = 'sync'
+    threads = 1
+else:
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 32))
+
+# The database pool is sized from GUNICORN_THREADS (db_profile.engine_options)
+os.environ['GUNICORN_THREADS'] = str(threads)
+
+# Build the app once in the master so workers share it copy-on-write
+preload_app = True
+# Outbound calls time out after 10s; leave room for a translation batch
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    """Drop per-worker metric files left over from a previous run"""
+    from config import Config
+    from metrics import clear_metrics_dir
+
+    clear_metrics_dir(Config.METRICS_DIR)
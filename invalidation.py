@@ -0,0 +1,178 @@
+"""
+Cross-worker cache invalidation bus.
+
+In-process caches (search_cache, user_cache, ...) subscribe to a key such as
+'articles' or 'users'. Write paths call invalidation.publish(key) before they
+commit: the bus increments that key's row in the cache_generation table in the
+same transaction, and once the transaction commits the local subscribers run
+straight away. Every worker, on this node or another one sharing the
+database, reads the whole table once per INVALIDATION_POLL_INTERVAL from a
+background thread and runs the subscribers of every key whose version moved.
+The poll never runs inside a request, so it does not count against query
+budgets or request metrics. Caches can therefore keep long TTLs.
+
+Keys nobody subscribes to are not written, since every worker runs the same
+subscriptions. Without the table (run ``flask db upgrade``) publishing still
+invalidates the local worker and other workers fall back to their TTLs.
+"""
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from models import CacheGeneration, db
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationBus:
+    """Flask extension publishing and polling cache generations"""
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.poll_interval = 1.0
+        self.subscribers = {}
+        self.versions = {}
+        self.app = None
+        self._available = None
+        self._checked_at = 0.0
+        self._poller_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.setdefault('INVALIDATION_ENABLED', True)
+        self.poll_interval = float(app.config.setdefault('INVALIDATION_POLL_INTERVAL', 1.0))
+        # Versions and table availability belong to the app's database
+        self.app = app
+        self.versions = {}
+        self._available = None
+        self._checked_at = 0.0
+        self._poller_pid = None
+        if not event.contains(db.session, 'after_commit', self._after_commit):
+            event.listen(db.session, 'after_commit', self._after_commit)
+            event.listen(db.session, 'after_rollback', self._after_rollback)
+        if self.enabled:
+            app.before_request(self._before_request)
+        app.extensions['invalidation'] = self
+
+    def subscribe(self, key, callback):
+        """Call callback() whenever key is published, by this worker or any other"""
+        callbacks = self.subscribers.setdefault(key, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    def publish(self, *keys):
+        """
+        Bump keys as part of the current db.session transaction. Rows are
+        created by the first poll of a worker, so keys no worker has seen yet
+        are only invalidated locally (no worker can have cached them).
+        """
+        keys = [key for key in keys if key in self.subscribers]
+        if not keys:
+            return
+        db.session.info.setdefault(self, set()).update(keys)
+        # Usually the poller has checked for the table already; a CLI command
+        # (or a worker's first request) has no poller yet, so check once here
+        if self._available is None:
+            self._ready()
+        if not self._available:
+            return
+        db.session.execute(update(CacheGeneration)
+                           .where(CacheGeneration.key.in_(keys))
+                           .values(version=CacheGeneration.version + 1)
+                           .execution_options(synchronize_session=False))
+
+    def poll(self):
+        """Run the subscribers of every key another process bumped since the last poll"""
+        if not self._ready():
+            return
+        try:
+            with db.engine.connect() as conn:
+                rows = dict(conn.execute(select(CacheGeneration.key, CacheGeneration.version)).all())
+            if not self.versions:
+                self._seed(rows)
+        except SQLAlchemyError as e:
+            logger.warning('Polling cache generations failed: %s', e)
+            return
+        moved = []
+        with self._lock:
+            for key, version in rows.items():
+                known = self.versions.get(key)
+                self.versions[key] = version
+                if known is not None and known != version:
+                    moved.append(key)
+        for key in moved:
+            self._notify(key)
+
+    def _before_request(self):
+        # Threads do not survive fork, so start the poller lazily in every worker
+        if self._poller_pid == os.getpid():
+            return
+        with self._lock:
+            if self._poller_pid == os.getpid():
+                return
+            self._poller_pid = os.getpid()
+            threading.Thread(target=self._run, args=(self.app,), name='invalidation-poller',
+                             daemon=True).start()
+
+    def _run(self, app):
+        # Stops once the bus is bound to another app (tests create several)
+        while self.app is app:
+            with app.app_context():
+                try:
+                    self.poll()
+                except Exception:  # keep polling after unexpected errors
+                    logger.exception('Cache invalidation poll failed')
+            time.sleep(self.poll_interval)
+
+    def _ready(self):
+        """Whether the cache_generation table exists; rechecked every 30s while it does not"""
+        if not self.enabled:
+            return False
+        if self._available or time.monotonic() - self._checked_at < 30:
+            return bool(self._available)
+        self._checked_at = time.monotonic()
+        try:
+            self._available = inspect(db.engine).has_table(CacheGeneration.__tablename__)
+        except SQLAlchemyError as e:
+            logger.warning('Cache invalidation bus unavailable: %s', e)
+            self._available = False
+        if not self._available:
+            logger.warning('cache_generation table missing; run "flask db upgrade" to '
+                           'invalidate caches across workers')
+        return bool(self._available)
+
+    def _seed(self, existing):
+        """Insert a version 0 row for subscribed keys that have none yet"""
+        for key in self.subscribers:
+            if key in existing:
+                continue
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(CacheGeneration.__table__.insert(), {'key': key, 'version': 0})
+            except IntegrityError:
+                pass  # another worker seeded it first
+            existing[key] = 0
+
+    def _notify(self, key):
+        for callback in self.subscribers.get(key, []):
+            callback()
+
+    def _after_commit(self, session):
+        for key in session.info.pop(self, ()):
+            # Our own bump: remember it so the next poll does not invalidate a second time
+            with self._lock:
+                if key in self.versions:
+                    self.versions[key] += 1
+            self._notify(key)
+
+    def _after_rollback(self, session):
+        session.info.pop(self, None)
+
+
+invalidation = InvalidationBus()
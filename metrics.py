@@ -0,0 +1,437 @@
+"""
+Request-level performance instrumentation.
+
+Collects per-endpoint latency, SQL query count/time, outbound call timings and
+template render time, and exposes them in Prometheus text format at /metrics.
+Each worker process keeps its own in-memory store, and a background thread
+dumps it to a per-pid JSON file in METRICS_DIR every METRICS_FLUSH_INTERVAL
+seconds (also when the worker is idle), so the /metrics view of any gunicorn
+worker can aggregate the numbers of all workers. Files of workers that have
+exited keep counting, so totals do not drop when gunicorn replaces a worker;
+clear_metrics_dir() resets them when the server starts.
+"""
+import atexit
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Response, g, has_app_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger('timeless.slow_requests')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+# name -> (type, help text, buckets)
+METRICS = {
+    'timeless_http_request_duration_seconds': (
+        'histogram', 'Request latency by endpoint', LATENCY_BUCKETS),
+    'timeless_db_queries_per_request': (
+        'histogram', 'Number of SQL statements executed per request', QUERY_COUNT_BUCKETS),
+    'timeless_db_query_seconds_per_request': (
+        'histogram', 'Total SQL execution time per request', LATENCY_BUCKETS),
+    'timeless_outbound_request_duration_seconds': (
+        'histogram', 'Latency of calls to external services', LATENCY_BUCKETS),
+    'timeless_template_render_seconds': (
+        'histogram', 'Jinja template render time', LATENCY_BUCKETS),
+    'timeless_slow_requests_total': (
+        'counter', 'Requests slower than SLOW_REQUEST_THRESHOLD', None),
+    'timeless_user_cache_lookups_total': (
+        'counter', 'Logged-in user lookups by identity cache outcome', None),
+    'timeless_search_cache_lookups_total': (
+        'counter', 'Search result cache lookups by endpoint and outcome', None),
+    'timeless_translation_segments_total': (
+        'counter', 'Translated segments served from the translation memory or the translator', None),
+    'timeless_admission_total': (
+        'counter', 'Admission control decisions by endpoint and outcome', None),
+    'timeless_admission_wait_seconds': (
+        'histogram', 'Time requests spent queued for an endpoint slot', LATENCY_BUCKETS),
+    'timeless_group_commit_batch_size': (
+        'histogram', 'Rows written per group-commit transaction', QUERY_COUNT_BUCKETS),
+}
+
+
+class MetricStore:
+    """Thread-safe in-memory counters and histograms for one process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self.changes = 0  # bumped on every update, so unchanged stores need not be written
+
+    def inc(self, name, labels, amount=1.0):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+            self.changes += 1
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            # Per-bucket (non-cumulative) counts, then +Inf, sum and count
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * (len(buckets) + 1) + [0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            else:
+                entry[len(buckets)] += 1
+            entry[-2] += value
+            entry[-1] += 1
+            self.changes += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [[name, list(labels), value if isinstance(value, float) else list(value)]
+                    for (name, labels), value in self._values.items()]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self.changes += 1
+
+
+def merge_snapshots(snapshots):
+    """Sum snapshots from several processes into one {(name, labels): value} dict"""
+    merged = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot:
+            if name not in METRICS:
+                continue
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if isinstance(value, list):
+                current = merged.setdefault(key, [0] * len(value))
+                for i, v in enumerate(value):
+                    current[i] += v
+            else:
+                merged[key] = merged.get(key, 0.0) + value
+    return merged
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = []
+    for key, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        escaped.append(f'{key}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def render_prometheus(merged):
+    """Render merged metric values in the Prometheus text exposition format"""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, value) for (metric, labels), value in merged.items() if metric == name)
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind == 'counter':
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for i, bound in enumerate(buckets):
+                cumulative += value[i]
+                lines.append(f'{name}_bucket{_format_labels(labels, ("le", bound))} {cumulative}')
+            cumulative += value[len(buckets)]
+            lines.append(f'{name}_bucket{_format_labels(labels, ("le", "+Inf"))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value[-2]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+def clear_metrics_dir(directory):
+    """Remove worker snapshots left over from a previous server run"""
+    if not os.path.isdir(directory):
+        return
+    for filename in os.listdir(directory):
+        if filename.startswith(('metrics_', '.metrics_')):
+            try:
+                os.remove(os.path.join(directory, filename))
+            except OSError:
+                pass
+
+
+class _ActiveRequest:
+    __slots__ = ('start', 'samples')
+
+    def __init__(self, start):
+        self.start = start
+        self.samples = Counter()
+
+
+class SlowRequestSampler:
+    """
+    Background thread that samples the stacks of requests which have been
+    running longer than the slow-request threshold. Requests below the
+    threshold are never sampled, so the cost for normal traffic is a dict
+    insert and delete per request.
+    """
+
+    def __init__(self, threshold, interval, max_depth=30):
+        self.threshold = threshold
+        self.interval = interval
+        self.max_depth = max_depth
+        self._active = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self):
+        # Threads do not survive fork, so start one lazily in every worker
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._active = {}
+            thread = threading.Thread(target=self._run, name='slow-request-sampler', daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+
+    def begin(self):
+        self._ensure_thread()
+        self._active[threading.get_ident()] = _ActiveRequest(time.perf_counter())
+
+    def end(self):
+        """Stop tracking the current thread and return its stack samples"""
+        entry = self._active.pop(threading.get_ident(), None)
+        return entry.samples if entry is not None else Counter()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self._active:
+                continue
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for thread_id, entry in list(self._active.items()):
+                if now - entry.start < self.threshold:
+                    continue
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = traceback.extract_stack(frame, limit=self.max_depth)
+                entry.samples[';'.join(
+                    f'{f.name} ({os.path.basename(f.filename)}:{f.lineno})' for f in stack
+                )] += 1
+
+
+class Metrics:
+    """Flask extension wiring request, SQL, template and outbound timing into a MetricStore"""
+
+    def __init__(self, app=None):
+        self.store = MetricStore()
+        self.directory = None
+        self.flush_interval = 1.0
+        self.sampler = None
+        self._flushed_changes = None
+        self._flusher_pid = None
+        self._flusher_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        self.directory = app.config.get('METRICS_DIR') or os.path.join(
+            tempfile.gettempdir(), 'timeless_echoes_metrics')
+        os.makedirs(self.directory, exist_ok=True)
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', 1.0)
+
+        threshold = app.config.get('SLOW_REQUEST_THRESHOLD')
+        if threshold:
+            self.sampler = SlowRequestSampler(
+                threshold, app.config.get('SLOW_REQUEST_SAMPLE_INTERVAL', 0.01))
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self.metrics_view)
+
+        # Time every top-level template render
+        metrics = self
+
+        class TimedTemplate(app.jinja_env.template_class):
+            def render(self, *args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return super().render(*args, **kwargs)
+                finally:
+                    metrics.store.observe('timeless_template_render_seconds',
+                                          {'template': self.name or 'string'},
+                                          time.perf_counter() - start)
+
+        app.jinja_env.template_class = TimedTemplate
+
+        db = app.extensions['sqlalchemy']
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        atexit.register(self.flush)
+        app.extensions['metrics'] = self
+
+    # SQLAlchemy hooks
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('metrics_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if has_app_context() and 'metrics_start' in g:
+            g.metrics_queries += 1
+            g.metrics_query_time += elapsed
+
+    # Request hooks
+    def _ensure_flusher(self):
+        # Threads do not survive fork, so start one lazily in every worker
+        if self._flusher_pid == os.getpid():
+            return
+        with self._flusher_lock:
+            if self._flusher_pid == os.getpid():
+                return
+            thread = threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True)
+            thread.start()
+            self._flusher_pid = os.getpid()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self.store.changes != self._flushed_changes:
+                self.flush()
+
+    def _before_request(self):
+        self._ensure_flusher()
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_query_time = 0.0
+        g.metrics_outbound_time = 0.0
+        g.metrics_status = 500
+        if self.sampler is not None:
+            self.sampler.begin()
+
+    def _after_request(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def _teardown_request(self, exc):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        endpoint = request.endpoint or 'unmatched'
+        status = str(g.get('metrics_status', 500))
+
+        self.store.observe('timeless_http_request_duration_seconds',
+                           {'endpoint': endpoint, 'method': request.method, 'status': status},
+                           duration)
+        self.store.observe('timeless_db_queries_per_request', {'endpoint': endpoint}, g.metrics_queries)
+        self.store.observe('timeless_db_query_seconds_per_request', {'endpoint': endpoint},
+                           g.metrics_query_time)
+
+        if self.sampler is not None:
+            samples = self.sampler.end()
+            if duration >= self.sampler.threshold:
+                self.store.inc('timeless_slow_requests_total', {'endpoint': endpoint})
+                self._log_slow_request(endpoint, status, duration, samples)
+
+    def _log_slow_request(self, endpoint, status, duration, samples):
+        slow_logger.warning(json.dumps({
+            'event': 'slow_request',
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': int(status),
+            'duration': round(duration, 4),
+            'db_queries': g.metrics_queries,
+            'db_time': round(g.metrics_query_time, 4),
+            'outbound_time': round(g.metrics_outbound_time, 4),
+            'stack_samples': [{'count': count, 'stack': stack}
+                              for stack, count in samples.most_common(5)],
+        }))
+
+    @contextmanager
+    def outbound(self, service):
+        """Time a call to an external service (translator, Nominatim, ...)"""
+        start = time.perf_counter()
+        outcome = 'ok'
+        try:
+            yield
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.store.observe('timeless_outbound_request_duration_seconds',
+                               {'service': service, 'outcome': outcome}, elapsed)
+            if has_app_context() and 'metrics_start' in g:
+                g.metrics_outbound_time += elapsed
+
+    @contextmanager
+    def outbound_wait(self):
+        """
+        Charge the wall time a request spends waiting on outbound calls that
+        run on other threads (clients.map_outbound) to that request.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if has_app_context() and 'metrics_start' in g:
+                g.metrics_outbound_time += time.perf_counter() - start
+
+    # Multiprocess aggregation
+    def _path_for(self, pid):
+        return os.path.join(self.directory, f'metrics_{pid}.json')
+
+    def flush(self):
+        """Atomically write this process' snapshot to METRICS_DIR"""
+        if self.directory is None:
+            return
+        self._flushed_changes = self.store.changes
+        path = self._path_for(os.getpid())
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.metrics_')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.store.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing metrics snapshot: {str(e)}")
+
+    def collect(self):
+        """Merge the snapshots of every worker, using live values for this process"""
+        own = self._path_for(os.getpid())
+        snapshots = [self.store.snapshot()]
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            if not filename.startswith('metrics_') or path == own:
+                continue
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                # File may be mid-replace or truncated; skip it this scrape
+                continue
+        return merge_snapshots(snapshots)
+
+    def metrics_view(self):
+        return Response(render_prometheus(self.collect()),
+                        mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+metrics = Metrics()
@@ -49,4 +49,35 @@ class Comment(db.Model):
     article_id = db.Column(db.Integer, db.ForeignKey('article.id'))
 
     def __repr__(self):
-        return f'<Comment {self.id}>'
\ No newline at end of file
+        return f'<Comment {self.id}>'
+
+class CacheGeneration(db.Model):
+    """Version counter per cache key; workers poll it to drop stale in-process cache entries"""
+    key = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CacheGeneration {self.key}={self.version}>'
+
+
+class SegmentTranslation(db.Model):
+    """Translation of one sentence or line, keyed by the SHA-256 of its source text"""
+    segment_hash = db.Column(db.String(64), primary_key=True)
+    language = db.Column(db.String(8), primary_key=True)
+    text = db.Column(db.Text, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SegmentTranslation {self.segment_hash[:8]}:{self.language}>'
+
+
+class ImportCheckpoint(db.Model):
+    """Progress of a bulk import, committed in the same transaction as each batch"""
+    source = db.Column(db.String(512), primary_key=True)
+    records = db.Column(db.Integer, nullable=False, default=0)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ImportCheckpoint {self.source}: {self.records}>'
@@ -0,0 +1,178 @@
+"""
+Query-budget and N+1 detection.
+
+Records the normalized SQL statements executed inside a request or a test
+block and flags statement shapes that repeat (typically a lazy load per row,
+e.g. ``article.author`` inside a listing loop).
+
+In tests::
+
+    with query_budget(db.engine, max_queries=5, max_repeats=1):
+        client.get('/')
+
+or enable QUERY_BUDGET_ENFORCE so every request is checked against the
+per-endpoint limits in QUERY_BUDGETS. In production a QUERY_BUDGET_SAMPLE_RATE
+fraction of requests is recorded and offenders are written as JSON to the
+``timeless.query_budget`` logger.
+"""
+import json
+import logging
+import random
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+
+budget_logger = logging.getLogger('timeless.query_budget')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'\?|%\(\w+\)s|%s|:\w+')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(statement):
+    """Reduce a SQL statement to its shape: literals, placeholders and IN lists collapse to ?"""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _PLACEHOLDER.sub('?', shape)
+    shape = _IN_LIST.sub('IN (?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block or request executes more queries than its budget allows"""
+
+
+class QueryReport:
+    """Normalized statements recorded for one request or block"""
+
+    def __init__(self, statements):
+        self.statements = list(statements)
+        self.shapes = Counter(self.statements)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self, max_repeats):
+        """Statement shapes executed more than max_repeats times (likely N+1)"""
+        return {shape: n for shape, n in self.shapes.most_common() if n > max_repeats}
+
+    def violations(self, max_queries=None, max_repeats=None):
+        problems = []
+        if max_queries is not None and self.count > max_queries:
+            problems.append(f'{self.count} queries executed, budget is {max_queries}')
+        if max_repeats is not None:
+            for shape, n in self.repeated(max_repeats).items():
+                problems.append(f'{n}x (max {max_repeats}): {shape}')
+        return problems
+
+    def check(self, max_queries=None, max_repeats=None, label='block'):
+        problems = self.violations(max_queries, max_repeats)
+        if problems:
+            raise QueryBudgetExceeded(f'Query budget exceeded for {label}:\n  ' + '\n  '.join(problems))
+
+
+class QueryRecorder:
+    """Context manager recording statements executed on an engine by the current thread"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self._thread_id = None
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread_id:
+            self.statements.append(normalize_sql(statement))
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        return False
+
+    @property
+    def report(self):
+        return QueryReport(self.statements)
+
+
+@contextmanager
+def query_budget(engine, max_queries=None, max_repeats=None, label='block'):
+    """Fail with QueryBudgetExceeded if the wrapped block exceeds its query budget"""
+    with QueryRecorder(engine) as recorder:
+        yield recorder
+    recorder.report.check(max_queries, max_repeats, label)
+
+
+class QueryBudget:
+    """Flask extension applying per-endpoint query budgets to requests"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('QUERY_BUDGETS', {})
+        app.config.setdefault('QUERY_BUDGET_MAX_REPEATS', None)
+        app.config.setdefault('QUERY_BUDGET_SAMPLE_RATE', 0.0)
+        app.config.setdefault('QUERY_BUDGET_ENFORCE', False)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+        db = app.extensions['sqlalchemy']
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._record)
+        app.extensions['query_budget'] = self
+
+    def limits_for(self, endpoint):
+        """Return (max_queries, max_repeats) for an endpoint"""
+        budget = current_app.config['QUERY_BUDGETS'].get(endpoint, {})
+        if isinstance(budget, int):
+            budget = {'max_queries': budget}
+        return (budget.get('max_queries'),
+                budget.get('max_repeats', current_app.config['QUERY_BUDGET_MAX_REPEATS']))
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if has_app_context() and 'query_budget_statements' in g:
+            g.query_budget_statements.append(normalize_sql(statement))
+
+    def _before_request(self):
+        config = current_app.config
+        if config['QUERY_BUDGET_ENFORCE'] or random.random() < config['QUERY_BUDGET_SAMPLE_RATE']:
+            g.query_budget_statements = []
+
+    def _after_request(self, response):
+        statements = g.pop('query_budget_statements', None)
+        if statements is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        max_queries, max_repeats = self.limits_for(endpoint)
+        report = QueryReport(statements)
+        if current_app.config['QUERY_BUDGET_ENFORCE']:
+            report.check(max_queries, max_repeats, label=endpoint)
+            return response
+        problems = report.violations(max_queries, max_repeats)
+        if problems:
+            budget_logger.warning(json.dumps({
+                'event': 'query_budget_exceeded',
+                'endpoint': endpoint,
+                'path': request.path,
+                'query_count': report.count,
+                'max_queries': max_queries,
+                'max_repeats': max_repeats,
+                'repeated': [{'count': n, 'statement': shape}
+                             for shape, n in report.repeated(max_repeats or 1).items()],
+            }))
+        return response
+
+
+query_budgets = QueryBudget()
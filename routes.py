@@ -1,52 +1,32 @@
 import os
-import json
-from flask import render_template, redirect, url_for, flash, request, jsonify, abort
+from flask import (
+    Blueprint, current_app, render_template, redirect, url_for, flash, request, jsonify, abort,
+    Response, stream_with_context
+)
 from flask_login import current_user, login_user, logout_user, login_required
 from werkzeug.utils import secure_filename
 from werkzeug.urls import url_parse
 import uuid
+from datetime import datetime
 import logging
-import requests
-from deep_translator import GoogleTranslator
-from urllib.parse import quote
+from types import SimpleNamespace
 
-from app import app, db
-from models import User, Article, Comment
+from exporter import FORMATS as EXPORT_FORMATS, export_stream, parse_since
+from models import db, User, Article, Comment
 from forms import (
     LoginForm, RegistrationForm, ArticleForm, CommentForm, SearchForm,
     ChangePasswordForm, DeleteAccountForm
 )
 from sqlalchemy import or_
+from group_commit import GroupCommitTimeout, comment_writes
+from invalidation import invalidation
+from search_cache import normalize_query, search_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-# Initialize translator
-translator = GoogleTranslator()
-
-# Available languages for translation
-LANGUAGES = {
-    'en': 'English',
-    'hi': 'Hindi',
-    'bn': 'Bengali',
-    'te': 'Telugu',
-    'mr': 'Marathi',
-    'ta': 'Tamil',
-    'ur': 'Urdu',
-    'gu': 'Gujarati',
-    'kn': 'Kannada',
-    'ml': 'Malayalam',
-    'pa': 'Punjabi',
-    'or': 'Odia',
-    'es': 'Spanish',
-    'fr': 'French',
-    'de': 'German',
-    'zh': 'Chinese',
-    'ja': 'Japanese',
-    'ru': 'Russian',
-    'ar': 'Arabic'
-}
+bp = Blueprint('main', __name__)
 
 # Helper functions
 def allowed_file(filename):
@@ -61,7 +41,7 @@ def save_image(file):
         # Add a unique identifier to prevent filename collisions
         unique_filename = f"{uuid.uuid4().hex}_{filename}"
         # Ensure the upload folder exists
-        upload_folder = app.config['UPLOAD_FOLDER']
+        upload_folder = current_app.config['UPLOAD_FOLDER']
         os.makedirs(upload_folder, exist_ok=True)
         # Save the file
         file_path = os.path.join(upload_folder, unique_filename)
@@ -71,11 +51,21 @@ def save_image(file):
     return None
 
 # Helper function to generate search form for all templates
+def search_filter(query_text):
+    """Match query_text in title, description, state, district or village"""
+    return or_(
+        Article.title.ilike(f'%{query_text}%'),
+        Article.description.ilike(f'%{query_text}%'),
+        Article.state.ilike(f'%{query_text}%'),
+        Article.district.ilike(f'%{query_text}%'),
+        Article.village.ilike(f'%{query_text}%')
+    )
+
 def get_search_form():
     return SearchForm(request.args, csrf_enabled=False) if request.args.get('query') else SearchForm(csrf_enabled=False)
 
 # Home page route
-@app.route('/')
+@bp.route('/')
 def index():
     # Get filter parameters if they exist
     state = request.args.get('state', '')
@@ -117,91 +107,99 @@ def index():
                           selected_village=village, search_form=get_search_form())
 
 # Search route
-@app.route('/search')
+@bp.route('/search')
 def search():
     search_form = get_search_form()
     page = request.args.get('page', 1, type=int)
     
     if search_form.validate():
         query_text = search_form.query.data
-        
-        # Search in title, description, state, district, and village
-        search_results = Article.query.filter(
-            or_(
-                Article.title.ilike(f'%{query_text}%'),
-                Article.description.ilike(f'%{query_text}%'),
-                Article.state.ilike(f'%{query_text}%'),
-                Article.district.ilike(f'%{query_text}%'),
-                Article.village.ilike(f'%{query_text}%')
-            )
-        ).order_by(Article.timestamp.desc()).paginate(page=page, per_page=6)
-        
+        normalized = normalize_query(query_text)
+
+        def run_search():
+            search_results = Article.query.filter(search_filter(normalized)) \
+                .order_by(Article.timestamp.desc()).paginate(page=page, per_page=6)
+            return {
+                # Cache the excerpt the template shows, not the whole description
+                'items': [{'id': a.id, 'title': a.title,
+                           'description': a.description[:150] + '...' if len(a.description) > 150 else a.description,
+                           'image_path': a.image_path, 'state': a.state, 'district': a.district,
+                           'timestamp': a.timestamp} for a in search_results.items],
+                'total': search_results.total,
+                'page': search_results.page,
+                'pages': search_results.pages,
+                'has_prev': search_results.has_prev,
+                'has_next': search_results.has_next,
+                'prev_num': search_results.prev_num,
+                'next_num': search_results.next_num,
+            }
+
+        search_results = SimpleNamespace(**search_cache.cached('main.search', (normalized, page), run_search))
+
         return render_template('search_results.html', 
                             search_results=search_results, 
                             query=query_text,
                             search_form=search_form)
     
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 # AJAX Search route for autocomplete and instant results
-@app.route('/api/search')
+@bp.route('/api/search')
 def api_search():
     query_text = request.args.get('query', '')
     if not query_text or len(query_text) < 3:
         return jsonify({"results": []})
     
-    # Search in title, description, state, district, and village
-    search_results = Article.query.filter(
-        or_(
-            Article.title.ilike(f'%{query_text}%'),
-            Article.description.ilike(f'%{query_text}%'),
-            Article.state.ilike(f'%{query_text}%'),
-            Article.district.ilike(f'%{query_text}%'),
-            Article.village.ilike(f'%{query_text}%')
-        )
-    ).order_by(Article.timestamp.desc()).limit(5).all()
-    
-    results = []
-    for article in search_results:
-        results.append({
-            'id': article.id,
-            'title': article.title,
-            'description': article.description[:100] + '...' if len(article.description) > 100 else article.description,
-            'image_path': article.image_path if article.image_path else 'uploads/default.jpg',
-            'state': article.state,
-            'district': article.district,
-            'url': url_for('view_article', article_id=article.id)
-        })
-    
-    return jsonify({"results": results})
+    normalized = normalize_query(query_text)
+
+    def run_search():
+        search_results = Article.query.filter(search_filter(normalized)) \
+            .order_by(Article.timestamp.desc()).limit(5).all()
+
+        results = []
+        for article in search_results:
+            results.append({
+                'id': article.id,
+                'title': article.title,
+                'description': article.description[:100] + '...' if len(article.description) > 100 else article.description,
+                'image_path': article.image_path if article.image_path else 'uploads/default.jpg',
+                'state': article.state,
+                'district': article.district,
+                'url': url_for('main.view_article', article_id=article.id)
+            })
+        # Cache the serialized body so hits skip JSON encoding too
+        return current_app.json.dumps({"results": results}).encode()
+
+    body = search_cache.cached('main.api_search', (normalized,), run_search)
+    return current_app.response_class(body, mimetype='application/json')
 
 # User authentication routes
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
         if user is None or not user.check_password(form.password.data):
             flash('Invalid email or password')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         login_user(user, remember=form.remember_me.data)
         next_page = request.args.get('next')
         if not next_page or url_parse(next_page).netloc != '':
-            next_page = url_for('index')
+            next_page = url_for('main.index')
         return redirect(next_page)
     return render_template('login.html', form=form, search_form=get_search_form())
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     logout_user()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     form = RegistrationForm()
     if form.validate_on_submit():
         user = User(username=form.username.data, email=form.email.data)
@@ -209,18 +207,18 @@ def register():
         db.session.add(user)
         db.session.commit()
         flash('Registration successful! Please log in.')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     return render_template('register.html', form=form, search_form=get_search_form())
 
 # Article routes
-@app.route('/article/<int:article_id>')
+@bp.route('/article/<int:article_id>')
 def view_article(article_id):
     article = Article.query.get_or_404(article_id)
     form = CommentForm()
     # Pass the Comment model to the template
     return render_template('article.html', article=article, form=form, Comment=Comment, search_form=get_search_form())
 
-@app.route('/create', methods=['GET', 'POST'])
+@bp.route('/create', methods=['GET', 'POST'])
 @login_required
 def create_article():
     form = ArticleForm()
@@ -253,12 +251,13 @@ def create_article():
             author=current_user
         )
         db.session.add(article)
+        invalidation.publish('articles')
         db.session.commit()
         flash('Your article has been published!')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     return render_template('create_article.html', form=form, search_form=get_search_form())
 
-@app.route('/article/<int:article_id>/edit', methods=['GET', 'POST'])
+@bp.route('/article/<int:article_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_article(article_id):
     article = Article.query.get_or_404(article_id)
@@ -266,7 +265,7 @@ def edit_article(article_id):
     # Check if the current user is the author of the article
     if article.user_id != current_user.id:
         flash('You can only edit your own articles.')
-        return redirect(url_for('view_article', article_id=article_id))
+        return redirect(url_for('main.view_article', article_id=article_id))
     
     form = ArticleForm()
     
@@ -294,7 +293,7 @@ def edit_article(article_id):
                 # Remove the old image if it exists and it's not the default
                 if article.image_path and article.image_path != 'uploads/default.jpg':
                     try:
-                        old_image_path = os.path.join(app.config['UPLOAD_FOLDER'], article.image_path.split('/')[-1])
+                        old_image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], article.image_path.split('/')[-1])
                         if os.path.exists(old_image_path):
                             os.remove(old_image_path)
                     except Exception as e:
@@ -302,9 +301,10 @@ def edit_article(article_id):
                 
                 article.image_path = image_path
         
+        invalidation.publish('articles')
         db.session.commit()
         flash('Your article has been updated!')
-        return redirect(url_for('view_article', article_id=article_id))
+        return redirect(url_for('main.view_article', article_id=article_id))
     
     # Pre-populate the form with existing article data
     elif request.method == 'GET':
@@ -320,23 +320,34 @@ def edit_article(article_id):
     
     return render_template('edit_article.html', form=form, article=article, search_form=get_search_form())
 
-@app.route('/article/<int:article_id>/comment', methods=['POST'])
+@bp.route('/article/<int:article_id>/comment', methods=['POST'])
 @login_required
 def add_comment(article_id):
     article = Article.query.get_or_404(article_id)
     form = CommentForm()
     if form.validate_on_submit():
-        comment = Comment(
-            body=form.body.data,
-            author=current_user,
-            article=article
-        )
-        db.session.add(comment)
-        db.session.commit()
+        if comment_writes.enabled:
+            row = {'body': form.body.data, 'user_id': current_user.id, 'article_id': article.id,
+                   'timestamp': datetime.utcnow()}
+            # End our read transaction so it cannot hold up the committer's write
+            db.session.rollback()
+            try:
+                comment_writes.submit(row)
+            except GroupCommitTimeout:
+                flash('The server is busy and your comment was not saved. Please try again.')
+                return redirect(url_for('main.view_article', article_id=article_id))
+        else:
+            comment = Comment(
+                body=form.body.data,
+                author=current_user,
+                article=article
+            )
+            db.session.add(comment)
+            db.session.commit()
         flash('Your comment has been added!')
-    return redirect(url_for('view_article', article_id=article_id))
+    return redirect(url_for('main.view_article', article_id=article_id))
 
-@app.route('/article/<int:article_id>/delete', methods=['POST'])
+@bp.route('/article/<int:article_id>/delete', methods=['POST'])
 @login_required
 def delete_article(article_id):
     article = Article.query.get_or_404(article_id)
@@ -344,12 +355,12 @@ def delete_article(article_id):
     # Check if the current user is the author
     if article.user_id != current_user.id:
         flash('You can only delete your own articles.')
-        return redirect(url_for('view_article', article_id=article_id))
+        return redirect(url_for('main.view_article', article_id=article_id))
     
     # Delete image file if exists
     if article.image_path and article.image_path != 'uploads/default.jpg':
         try:
-            old_image_path = os.path.join(app.config['UPLOAD_FOLDER'], article.image_path.split('/')[-1])
+            old_image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], article.image_path.split('/')[-1])
             if os.path.exists(old_image_path):
                 os.remove(old_image_path)
         except Exception as e:
@@ -357,33 +368,34 @@ def delete_article(article_id):
     
     # Delete article (will cascade delete comments)
     db.session.delete(article)
+    invalidation.publish('articles')
     db.session.commit()
     
     flash('Your article has been deleted.')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 # API routes for location filters
-@app.route('/get_districts')
+@bp.route('/get_districts')
 def get_districts():
     state = request.args.get('state')
     districts = db.session.query(Article.district).filter(Article.state == state).distinct().all()
     districts = [district[0] for district in districts if district[0]]  # Filter out None or empty values
     return jsonify({'districts': districts})
 
-@app.route('/get_villages')
+@bp.route('/get_villages')
 def get_villages():
     district = request.args.get('district')
     villages = db.session.query(Article.village).filter(Article.district == district).distinct().all()
     villages = [village[0] for village in villages if village[0]]  # Filter out None or empty values
     return jsonify({'villages': villages})
 
-@app.route('/profile')
+@bp.route('/profile')
 @login_required
 def profile():
     user_articles = Article.query.filter_by(user_id=current_user.id).order_by(Article.timestamp.desc()).all()
     return render_template('profile.html', articles=user_articles, search_form=get_search_form())
 
-@app.route('/settings', methods=['GET', 'POST'])
+@bp.route('/settings', methods=['GET', 'POST'])
 @login_required
 def settings():
     password_form = ChangePasswordForm()
@@ -393,18 +405,19 @@ def settings():
         # Change password logic
         if not current_user.check_password(password_form.current_password.data):
             flash('Current password is incorrect', 'error')
-            return redirect(url_for('settings'))
+            return redirect(url_for('main.settings'))
             
         current_user.set_password(password_form.new_password.data)
+        invalidation.publish('users')
         db.session.commit()
         flash('Your password has been updated!', 'success')
-        return redirect(url_for('settings'))
+        return redirect(url_for('main.settings'))
         
     if delete_form.submit.data and delete_form.validate_on_submit():
         # Delete account logic
         if not current_user.check_password(delete_form.confirmation.data):
             flash('Password is incorrect', 'error')
-            return redirect(url_for('settings'))
+            return redirect(url_for('main.settings'))
             
         # Delete all user content
         articles = Article.query.filter_by(user_id=current_user.id).all()
@@ -412,7 +425,7 @@ def settings():
             # Delete associated image files
             if article.image_path and article.image_path != 'uploads/default.jpg':
                 try:
-                    image_path = os.path.join(app.config['UPLOAD_FOLDER'], article.image_path.split('/')[-1])
+                    image_path = os.path.join(current_app.config['UPLOAD_FOLDER'], article.image_path.split('/')[-1])
                     if os.path.exists(image_path):
                         os.remove(image_path)
                 except Exception as e:
@@ -426,105 +439,41 @@ def settings():
         # Then delete the user account
         user = User.query.get(user_id)
         db.session.delete(user)
+        invalidation.publish('users', 'articles')
         db.session.commit()
         
         flash('Your account has been permanently deleted.', 'info')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
         
     return render_template('settings.html', 
                           password_form=password_form, 
                           delete_form=delete_form,
                           search_form=get_search_form())
 
-@app.route('/translate', methods=['POST'])
-def translate_text():
-    try:
-        data = request.json
-        logger.info(f"Received translation request: {data}")
-        
-        if not data or 'texts' not in data or 'target_lang' not in data:
-            logger.error("Invalid request parameters")
-            return jsonify({'error': 'Invalid request parameters'}), 400
-        
-        texts = data['texts']
-        target_lang = data['target_lang']
-        
-        # Check if inputs are valid
-        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
-            logger.error("Invalid texts format")
-            return jsonify({'error': 'Texts must be a list of strings'}), 400
-        
-        if not isinstance(target_lang, str) or len(target_lang) != 2:
-            logger.error(f"Invalid target language: {target_lang}")
-            return jsonify({'error': 'Target language must be a 2-letter language code'}), 400
-        
-        # Validate target language code
-        if target_lang not in LANGUAGES:
-            logger.error(f"Unsupported language code: {target_lang}")
-            return jsonify({'error': f'Invalid language code: {target_lang}'}), 400
-        
-        translations = []
-        
-        for i, text in enumerate(texts):
-            # Skip translation if text is empty
-            if not text or text.strip() == '':
-                logger.info(f"Skipping empty text at index {i}")
-                translations.append('')
-                continue
-            
-            try:
-                logger.info(f"Translating text {i}: '{text[:100]}...' to {target_lang}")
-                # Create a new translator instance for each translation
-                translator = GoogleTranslator(source='auto', target=target_lang)
-                translated_text = translator.translate(text)
-                if not translated_text:
-                    raise Exception("Empty translation received")
-                logger.info(f"Translation {i} successful: '{translated_text[:100]}...'")
-                translations.append(translated_text)
-            except Exception as e:
-                logger.error(f"Error translating text {i}: {str(e)}")
-                return jsonify({'error': f'Translation failed: {str(e)}'}), 500
-        
-        response = {'translations': translations}
-        logger.info(f"Sending response with {len(translations)} translations")
-        return jsonify(response)
-    
-    except Exception as e:
-        logger.error(f"Translation error: {str(e)}")
-        return jsonify({'error': 'Translation failed', 'details': str(e)}), 500
-
-@app.route('/api/validate_coordinates', methods=['POST'])
-def validate_coordinates():
-    """Validate coordinates are within valid ranges"""
-    data = request.get_json()
-    lat = data.get('latitude')
-    lng = data.get('longitude')
-    
-    if lat is None or lng is None:
-        return jsonify({'error': 'Coordinates required'}), 400
-    
+# Streaming bulk export for partners
+@bp.route('/export/articles.<fmt>')
+@login_required
+def export_articles(fmt):
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
     try:
-        lat = float(lat)
-        lng = float(lng)
-        
-        if -90 <= lat <= 90 and -180 <= lng <= 180:
-            return jsonify({'valid': True})
-        return jsonify({'valid': False, 'error': 'Coordinates out of range'})
-        
+        since = parse_since(request.args.get('since'))
     except ValueError:
-        return jsonify({'valid': False, 'error': 'Invalid coordinate format'})
+        return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
+    
+    compress = request.args.get('gzip') == '1'
+    filename = f"articles.{fmt}{'.gz' if compress else ''}"
+    response = Response(stream_with_context(export_stream(fmt, since, compress)),
+                        mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
 
 # Error handlers
-@app.errorhandler(404)
+@bp.app_errorhandler(404)
 def not_found_error(error):
     return render_template('404.html', search_form=get_search_form()), 404
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def internal_error(error):
     db.session.rollback()
     return render_template('500.html', search_form=get_search_form()), 500
-
-# Language list route for translation feature
-@app.route('/languages')
-def get_languages():
-    return jsonify(LANGUAGES)
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Result cache for the search endpoints.
+
+Entries are keyed by endpoint plus the normalized query (and page), and stamped
+with the content generation current when they were computed. Creating,
+editing or deleting an article bumps the generation, which turns every older
+entry into a miss. Eviction is LRU, bounded by SEARCH_CACHE_MAX_ENTRIES and an
+estimate of the cached bytes (SEARCH_CACHE_MAX_BYTES). Lookups are counted per
+endpoint in timeless_search_cache_lookups_total.
+
+Writes publish 'articles' on the invalidation bus (invalidation.py), which
+calls bump() in every worker; SEARCH_CACHE_TTL is the same fallback as
+USER_CACHE_TTL (see user_cache.py).
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import metrics
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(text):
+    """Trim and collapse whitespace; ASCII queries are also lower-cased since LIKE ignores their case"""
+    text = _WHITESPACE.sub(' ', text or '').strip()
+    return text.lower() if text.isascii() else text
+
+
+def estimate_size(value):
+    """Rough in-memory cost of a cached value in bytes"""
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    return len(json.dumps(value, default=str))
+
+
+class SearchCache:
+    """Flask extension holding an LRU of search results per process"""
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.max_entries = 4096
+        self.max_bytes = 16 * 1024 * 1024
+        self.ttl = 3600.0
+        self.generation = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.setdefault('SEARCH_CACHE_ENABLED', True)
+        self.max_entries = int(app.config.setdefault('SEARCH_CACHE_MAX_ENTRIES', 4096))
+        self.max_bytes = int(app.config.setdefault('SEARCH_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+        self.ttl = float(app.config.setdefault('SEARCH_CACHE_TTL', 3600.0))
+        app.extensions['search_cache'] = self
+
+    def cached(self, endpoint, key, compute):
+        """Return the cached value for (endpoint, key), calling compute() on a miss"""
+        if not self.enabled:
+            return compute()
+
+        full_key = (endpoint,) + tuple(key)
+        now = time.monotonic()
+        with self._lock:
+            generation = self.generation
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] == generation and entry[1] > now:
+                self._entries.move_to_end(full_key)
+                value = entry[2]
+            else:
+                value = None
+                if entry is not None:
+                    self._remove(full_key)
+
+        if value is not None:
+            metrics.store.inc('timeless_search_cache_lookups_total', {'endpoint': endpoint, 'outcome': 'hit'})
+            return value
+
+        metrics.store.inc('timeless_search_cache_lookups_total', {'endpoint': endpoint, 'outcome': 'miss'})
+        value = compute()
+        size = estimate_size(value)
+        if size <= self.max_bytes:
+            with self._lock:
+                # A write during compute() already made this result stale
+                if generation == self.generation:
+                    self._remove(full_key)
+                    self._entries[full_key] = (generation, now + self.ttl, value, size)
+                    self.size += size
+                    while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                        self._remove(next(iter(self._entries)))
+        return value
+
+    def _remove(self, full_key):
+        entry = self._entries.pop(full_key, None)
+        if entry is not None:
+            self.size -= entry[3]
+
+    def bump(self):
+        """Invalidate every cached result after article content changed"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {'generation': self.generation, 'entries': len(self._entries), 'bytes': self.size}
+
+
+search_cache = SearchCache()
@@ -0,0 +1,69 @@
+import threading
+
+from flask import Flask
+
+from admission import ADMITTED, QUEUE_FULL, QUEUED, TIMED_OUT, AdmissionControl, Limiter
+
+
+def test_limiter_queues_then_sheds():
+    limiter = Limiter(concurrency=1, queue=1, timeout=0.05)
+    assert limiter.acquire() == ADMITTED
+    assert limiter.acquire() == TIMED_OUT
+
+    limiter.timeout = 5.0
+    waiter_outcome = []
+    waiter = threading.Thread(target=lambda: waiter_outcome.append(limiter.acquire()))
+    waiter.start()
+    while limiter.waiting == 0:
+        pass
+    assert limiter.acquire() == QUEUE_FULL
+    limiter.release()
+    waiter.join()
+    assert waiter_outcome == [QUEUED]
+
+
+def bare_app(limits, ajax_concurrency=0):
+    app = Flask(__name__)
+    app.config.update(TESTING=True, ADMISSION_LIMITS=limits,
+                      ADMISSION_AJAX_CONCURRENCY=ajax_concurrency)
+    AdmissionControl(app)
+    app.add_url_rule('/translate', 'translate', lambda: 'translated')
+    app.add_url_rule('/', 'index', lambda: 'home')
+    return app
+
+
+def test_busy_endpoint_gets_429_with_retry_after():
+    app = bare_app({'translate': {'concurrency': 0, 'retry_after': 5}})
+    response = app.test_client().get('/translate')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '5'
+    assert app.test_client().get('/').status_code == 200
+
+
+def test_shared_pool_sheds_low_priority_only():
+    app = bare_app({'translate': {'concurrency': 4}, 'index': {'concurrency': 4, 'priority': 'high'}},
+                   ajax_concurrency=1)
+    admission = app.extensions['admission']
+    admission.ajax_pool.acquire()  # an AJAX request already in flight
+    client = app.test_client()
+    assert client.get('/translate').status_code == 503
+    assert client.get('/').status_code == 200
+    admission.ajax_pool.release()
+    assert client.get('/translate').status_code == 200
+    # Slots are handed back after each request
+    assert admission.ajax_pool.active == 0 and admission.limiters['translate'].active == 0
+
+
+def test_limits_apply_to_the_real_endpoints(make_app):
+    app = make_app(articles=1, ADMISSION_AJAX_CONCURRENCY=1, ADMISSION_LIMITS={
+        'api.translate_text': {'concurrency': 0, 'retry_after': 5},
+        'main.api_search': {'concurrency': 2},
+    })
+    client = app.test_client()
+    response = client.post('/translate', json={'texts': ['Hello'], 'target_lang': 'hi'})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '5'
+    assert client.get('/api/search?query=temple').status_code == 200
+    assert client.get('/').status_code == 200
+    admission = app.extensions['admission']
+    assert admission.limiters['main.api_search'].active == 0 and admission.ajax_pool.active == 0
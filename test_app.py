@@ -0,0 +1,21 @@
+import os
+
+
+def test_bytecode_cache_never_uses_a_shared_directory(make_app, tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    os.chmod(shared, 0o777)
+    app = make_app(JINJA_BYTECODE_CACHE=True, JINJA_BYTECODE_CACHE_DIR=str(shared))
+    assert app.jinja_env.bytecode_cache.directory != str(shared)
+
+    private = tmp_path / 'private'
+    app = make_app(JINJA_BYTECODE_CACHE=True, JINJA_BYTECODE_CACHE_DIR=str(private))
+    assert app.jinja_env.bytecode_cache.directory == str(private)
+    assert os.stat(private).st_mode & 0o777 == 0o700
+
+
+def test_db_group_loads_flask_migrate_on_demand(app):
+    result = app.test_cli_runner().invoke(args=['db', '--help'])
+    assert result.exit_code == 0
+    assert 'upgrade' in result.output
+    assert 'migrate' in app.extensions
@@ -0,0 +1,52 @@
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+
+from db_profile import database_uri, engine_options, sqlite_pragmas
+from models import db
+
+
+def test_database_uri_fixes_the_postgres_scheme():
+    assert database_uri({}) == 'sqlite:///timeless_echoes.db'
+    assert database_uri({'DATABASE_URL': 'postgres://u:p@db/te'}) == 'postgresql://u:p@db/te'
+
+
+def test_sqlite_file_gets_a_thread_sized_pool():
+    options = engine_options('sqlite:///timeless_echoes.db',
+                             {'GUNICORN_THREADS': '8', 'SQLITE_BUSY_TIMEOUT_MS': '2500'})
+    assert options == {
+        'pool_size': 9,
+        'max_overflow': 2,
+        'pool_timeout': 10.0,
+        'connect_args': {'timeout': 2.5, 'check_same_thread': False},
+    }
+
+
+def test_sqlite_memory_keeps_flask_sqlalchemy_defaults():
+    assert engine_options('sqlite://', {'GUNICORN_THREADS': '8'}) == {}
+    assert engine_options('sqlite:///:memory:', {}) == {}
+
+
+def test_server_databases_recycle_and_ping():
+    options = engine_options('postgresql://u:p@db/te', {'DATABASE_POOL_SIZE': '20',
+                                                        'DATABASE_ENGINE_OPTIONS': '{"pool_timeout": 3}'})
+    assert options['pool_size'] == 20
+    assert options['pool_timeout'] == 3
+    assert options['pool_recycle'] == 1800 and options['pool_pre_ping'] is True
+    assert 'connect_args' not in options
+
+
+def test_pragmas_are_applied_on_connect(make_app):
+    app = make_app(SQLITE_PRAGMAS=sqlite_pragmas({'SQLITE_BUSY_TIMEOUT_MS': '1234'}))
+    with app.app_context():
+        with db.engine.connect() as connection:
+            assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert connection.execute(text('PRAGMA busy_timeout')).scalar() == 1234
+            assert connection.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+
+
+def test_memory_database_is_left_alone(make_app):
+    app = make_app(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_ENGINE_OPTIONS=engine_options('sqlite://'))
+    with app.app_context():
+        assert isinstance(db.engine.pool, StaticPool)
+        with db.engine.connect() as connection:
+            assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'memory'
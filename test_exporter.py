@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from models import db, Article
+
+
+def set_timestamps(app):
+    """Temple 0..2 created on 1, 2 and 3 May; Temple 1 has coordinates"""
+    with app.app_context():
+        for article in Article.query.order_by(Article.id):
+            number = int(article.title.split()[-1])
+            article.timestamp = datetime(2025, 5, 1 + number, 9, 30)
+            if number == 1:
+                article.latitude, article.longitude = 18.2594, 79.9431
+        db.session.commit()
+
+
+def test_export_requires_login(client):
+    response = client.get('/export/articles.csv')
+    assert response.status_code == 302
+    assert '/login' in response.headers['Location']
+
+
+def test_csv_export(app, user_client):
+    set_timestamps(app)
+    response = user_client.get('/export/articles.csv')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=articles.csv'
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['title'] for row in rows] == ['Temple 0', 'Temple 1', 'Temple 2']
+    assert rows[0]['timestamp'] == '2025-05-01T09:30:00'
+    assert rows[0]['author'] == 'ravi'
+
+
+def test_geojson_export_skips_articles_without_coordinates(app, user_client):
+    set_timestamps(app)
+    response = user_client.get('/export/articles.geojson')
+    assert response.mimetype == 'application/geo+json'
+
+    collection = json.loads(response.get_data(as_text=True))
+    [feature] = collection['features']
+    assert feature['geometry'] == {'type': 'Point', 'coordinates': [79.9431, 18.2594]}
+    assert feature['properties']['title'] == 'Temple 1'
+    assert 'latitude' not in feature['properties']
+
+
+def test_since_is_exclusive(app, user_client):
+    set_timestamps(app)
+    response = user_client.get('/export/articles.jsonl?since=2025-05-02T09:30:00')
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['title'] for row in rows] == ['Temple 2']
+
+
+def test_bad_since_is_a_400(user_client):
+    response = user_client.get('/export/articles.jsonl?since=last-tuesday')
+    assert response.status_code == 400
+    assert 'ISO 8601' in response.get_json()['error']
+
+
+def test_concurrent_exports_are_limited(app, user_client):
+    limiter = app.extensions['admission'].limiters['main.export_articles']
+    limiter.acquire()  # an export already streaming in this worker
+    response = user_client.get('/export/articles.jsonl')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
+    limiter.release()
+    assert user_client.get('/export/articles.jsonl').status_code == 200
+    # The slot is held until the stream ends, then handed back
+    assert limiter.active == 0
@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from group_commit import GroupCommitQueue, GroupCommitTimeout
+from models import Comment
+
+
+class RecordingQueue(GroupCommitQueue):
+    def __init__(self, *args, **kwargs):
+        self.batches = []
+        super().__init__(*args, **kwargs)
+
+    def _commit(self, batch):
+        self.batches.append(len(batch))
+        super()._commit(batch)
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(articles=1, GROUP_COMMIT_ENABLED=True, GROUP_COMMIT_WINDOW=0.2)
+
+
+def submit_all(writes, rows):
+    start = threading.Barrier(len(rows))
+
+    def submit(row):
+        start.wait()
+        writes.submit(row)
+
+    with ThreadPoolExecutor(len(rows)) as pool:
+        futures = [pool.submit(submit, row) for row in rows]
+    return futures
+
+
+def test_concurrent_inserts_share_a_transaction(app):
+    writes = RecordingQueue(Comment.__table__, app=app)
+    futures = submit_all(writes, [{'body': f'comment {i}', 'article_id': 1} for i in range(20)])
+
+    assert all(future.exception() is None for future in futures)
+    assert max(writes.batches) > 1
+    with app.app_context():
+        assert Comment.query.count() == 20
+
+
+def test_failing_row_only_fails_its_own_request(app):
+    writes = RecordingQueue(Comment.__table__, app=app)
+    rows = [{'body': f'comment {i}', 'article_id': 1} for i in range(5)] + [{'body': None, 'article_id': 1}]
+    futures = submit_all(writes, rows)
+
+    assert [future.exception() is None for future in futures] == [True] * 5 + [False]
+    with pytest.raises(IntegrityError):
+        futures[-1].result()
+    with app.app_context():
+        assert Comment.query.count() == 5
+
+
+def test_timed_out_row_is_withdrawn(app):
+    writing, release = threading.Event(), threading.Event()
+
+    class SlowQueue(GroupCommitQueue):
+        def _commit(self, batch):
+            writing.set()
+            release.wait()
+            super()._commit(batch)
+
+    writes = SlowQueue(Comment.__table__, app=app)
+    with ThreadPoolExecutor(1) as pool:
+        first = pool.submit(writes.submit, {'body': 'first', 'article_id': 1})
+        writing.wait()
+        writes.timeout = 0.05
+        with pytest.raises(GroupCommitTimeout):
+            writes.submit({'body': 'second', 'article_id': 1})
+        release.set()
+        first.result()
+    writes.timeout = 10.0
+    writes.submit({'body': 'third', 'article_id': 1})  # queued behind the withdrawn row
+    with app.app_context():
+        assert [comment.body for comment in Comment.query.order_by(Comment.id)] == ['first', 'third']
+
+
+def test_comment_route_writes_through_the_queue(app, user_client):
+    response = user_client.post('/article/1/comment', data={'body': 'Lovely carvings'},
+                                follow_redirects=True)
+    assert b'Your comment has been added!' in response.data
+    assert app.extensions['group_commit']['comment']._queue is not None
+    with app.app_context():
+        comment = Comment.query.one()
+        assert (comment.body, comment.user_id, comment.article_id) == ('Lovely carvings', 1, 1)
+
+
+def test_comment_route_reports_a_withdrawn_row(app, user_client, monkeypatch):
+    writes = app.extensions['group_commit']['comment']
+    release = threading.Event()
+    monkeypatch.setattr(writes, 'timeout', 0.05)
+    # Every row waits behind a batch that never finishes in time
+    monkeypatch.setattr(writes, '_next_batch', lambda pending, concurrent: release.wait() and [])
+    response = user_client.post('/article/1/comment', data={'body': 'Lovely carvings'},
+                                follow_redirects=True)
+    release.set()
+    assert b'your comment was not saved' in response.data
+    with app.app_context():
+        assert Comment.query.count() == 0
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from importer import ArticleImporter, Checkpoint, validate_row
+from models import db, Article, CacheGeneration, ImportCheckpoint
+
+
+def make_row(i, **fields):
+    row = {'title': f'Stepwell {i}', 'description': 'A seven storey stepwell of carved stone.',
+           'state': 'Gujarat', 'district': 'Patan', 'village': 'Patan'}
+    row.update(fields)
+    return row
+
+
+def test_validate_row_cleans_and_rejects(app):
+    with app.app_context():
+        values, errors = validate_row(make_row(1, title='  Rani ki Vav  ', latitude='23.8589', longitude=72.1016))
+        assert errors is None
+        assert values['title'] == 'Rani ki Vav'
+        assert (values['latitude'], values['longitude'], values['address']) == (23.8589, 72.1016, None)
+
+        assert set(validate_row(make_row(2, title='Vav'))[1]) == {'title'}
+        assert set(validate_row(make_row(3, state=''))[1]) == {'state'}
+        assert set(validate_row(make_row(4, latitude='95', longitude='72'))[1]) == {'latitude'}
+        assert set(validate_row(make_row(5, longitude='east'))[1]) == {'longitude'}
+
+
+def test_resume_after_a_crash_inserts_every_row_once(app, monkeypatch):
+    records = [make_row(i) for i in range(5)] + [make_row(5, state='')]
+    with app.app_context():
+        importer = ArticleImporter(default_author='ravi', batch_size=2)
+        session = db.session()
+        commit = session.commit
+        commits = []
+
+        def crash_on_second_batch():
+            commits.append(1)
+            if len(commits) == 2:
+                raise RuntimeError('killed')
+            commit()
+
+        monkeypatch.setattr(session, 'commit', crash_on_second_batch)
+        with pytest.raises(RuntimeError):
+            list(importer.run(records, Checkpoint('partner.csv')))
+        monkeypatch.undo()
+        db.session.rollback()
+
+        checkpoint = Checkpoint('partner.csv')
+        assert checkpoint.records == 2
+        list(ArticleImporter(default_author='ravi', batch_size=2).run(records, checkpoint))
+
+        titles = [title for title, in db.session.query(Article.title).filter(Article.title.like('Stepwell%'))]
+        assert sorted(titles) == [f'Stepwell {i}' for i in range(5)]
+        row = db.session.get(ImportCheckpoint, 'partner.csv')
+        assert (row.records, row.inserted, row.rejected) == (6, 5, 1)
+
+
+def test_import_command_invalidates_caches_in_every_worker(app, tmp_path):
+    with app.app_context():
+        app.extensions['invalidation'].poll()  # a web worker seeded the generations
+        articles = db.session.get(CacheGeneration, 'articles').version
+    app.extensions['invalidation'].init_app(app)  # a fresh `flask` process has no poller
+    source = tmp_path / 'partner.jsonl'
+    source.write_text(json.dumps(make_row(1)) + '\n')
+
+    result = app.test_cli_runner().invoke(args=['import-articles', str(source), '--author', 'ravi',
+                                                '--workers', '1'])
+    assert 'Imported 1 articles' in result.output
+    with app.app_context():
+        assert db.session.get(CacheGeneration, 'articles').version == articles + 1
@@ -0,0 +1,65 @@
+import time
+
+from invalidation import InvalidationBus
+from models import db, CacheGeneration
+from query_budget import QueryRecorder
+
+
+def make_worker(app, name, events):
+    bus = InvalidationBus(app)
+    bus.subscribe('articles', lambda: events.append(name))
+    return bus
+
+
+def test_publish_reaches_other_workers_once(app):
+    events = []
+    worker_a, worker_b = make_worker(app, 'a', events), make_worker(app, 'b', events)
+    with app.app_context():
+        worker_a.poll()
+        worker_b.poll()
+        assert db.session.get(CacheGeneration, 'articles').version == 0
+
+        worker_a.publish('articles')
+        assert events == []
+        db.session.commit()
+        assert events == ['a']
+
+        worker_a.poll()  # its own bump is not applied a second time
+        worker_b.poll()
+        assert events == ['a', 'b']
+
+
+def test_rollback_and_unsubscribed_keys_publish_nothing(app):
+    events = []
+    worker = make_worker(app, 'a', events)
+    with app.app_context():
+        worker.poll()
+        worker.publish('articles', 'comments')
+        db.session.rollback()
+        db.session.commit()
+        assert events == []
+        assert db.session.get(CacheGeneration, 'articles').version == 0
+        assert db.session.get(CacheGeneration, 'comments') is None
+
+
+def test_missing_table_still_invalidates_locally(app):
+    events = []
+    worker = make_worker(app, 'a', events)
+    with app.app_context():
+        CacheGeneration.__table__.drop(db.engine)
+        worker.poll()
+        worker.publish('articles')
+        db.session.commit()
+        assert events == ['a']
+
+
+def test_poller_runs_outside_requests(app, client):
+    bus = app.extensions['invalidation']
+    with app.app_context():
+        with QueryRecorder(db.engine) as recorder:
+            assert client.get('/languages').status_code == 200
+        assert recorder.report.count == 0
+        deadline = time.monotonic() + 5
+        while len(bus.versions) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert bus.versions == {'articles': 0, 'users': 0}
@@ -0,0 +1,79 @@
+import json
+import os
+import time
+
+from metrics import LATENCY_BUCKETS, MetricStore, merge_snapshots, metrics, render_prometheus
+
+
+def test_store_counts_and_buckets():
+    store = MetricStore()
+    store.inc('timeless_slow_requests_total', {'endpoint': 'main.index'})
+    store.inc('timeless_slow_requests_total', {'endpoint': 'main.index'}, 2)
+    store.observe('timeless_admission_wait_seconds', {'endpoint': 'api.geocode'}, 0.02)
+    store.observe('timeless_admission_wait_seconds', {'endpoint': 'api.geocode'}, 60.0)
+    values = merge_snapshots([store.snapshot()])
+
+    assert values[('timeless_slow_requests_total', (('endpoint', 'main.index'),))] == 3.0
+    histogram = values[('timeless_admission_wait_seconds', (('endpoint', 'api.geocode'),))]
+    assert histogram[LATENCY_BUCKETS.index(0.025)] == 1
+    assert histogram[len(LATENCY_BUCKETS)] == 1  # +Inf
+    assert histogram[-2:] == [60.02, 2]
+
+
+def test_merge_sums_processes_and_skips_unknown_metrics():
+    a, b = MetricStore(), MetricStore()
+    a.inc('timeless_slow_requests_total', {'endpoint': 'main.index'})
+    b.inc('timeless_slow_requests_total', {'endpoint': 'main.index'})
+    b.observe('timeless_admission_wait_seconds', {'endpoint': 'api.geocode'}, 0.3)
+    a.observe('timeless_admission_wait_seconds', {'endpoint': 'api.geocode'}, 0.3)
+    merged = merge_snapshots([a.snapshot(), b.snapshot(), [['removed_metric', [], 5.0]]])
+
+    assert merged[('timeless_slow_requests_total', (('endpoint', 'main.index'),))] == 2.0
+    assert merged[('timeless_admission_wait_seconds', (('endpoint', 'api.geocode'),))][-1] == 2
+    assert not any(name == 'removed_metric' for name, _ in merged)
+
+
+def test_render_prometheus_is_cumulative_and_escaped():
+    store = MetricStore()
+    store.inc('timeless_slow_requests_total', {'endpoint': 'say "hi"\n'})
+    store.observe('timeless_admission_wait_seconds', {'endpoint': 'api.geocode'}, 0.001)
+    store.observe('timeless_admission_wait_seconds', {'endpoint': 'api.geocode'}, 0.3)
+    lines = render_prometheus(merge_snapshots([store.snapshot()])).splitlines()
+
+    assert '# TYPE timeless_slow_requests_total counter' in lines
+    assert 'timeless_slow_requests_total{endpoint="say \\"hi\\"\\n"} 1.0' in lines
+    assert 'timeless_admission_wait_seconds_bucket{endpoint="api.geocode",le="0.005"} 1' in lines
+    assert 'timeless_admission_wait_seconds_bucket{endpoint="api.geocode",le="0.5"} 2' in lines
+    assert 'timeless_admission_wait_seconds_bucket{endpoint="api.geocode",le="+Inf"} 2' in lines
+    assert 'timeless_admission_wait_seconds_count{endpoint="api.geocode"} 2' in lines
+
+
+def test_collect_merges_worker_files_including_exited_workers(app, tmp_path):
+    directory = tmp_path / 'metrics'
+    exited = [['timeless_slow_requests_total', [['endpoint', 'main.index']], 4.0]]
+    (directory / 'metrics_999999999.json').write_text(json.dumps(exited))
+    (directory / 'metrics_999999998.json').write_text('[["timeless_slow')  # mid-write
+    (directory / '.metrics_tmp123').write_text('garbage')
+    metrics.store.clear()
+    metrics.store.inc('timeless_slow_requests_total', {'endpoint': 'main.index'})
+
+    assert metrics.collect()[('timeless_slow_requests_total', (('endpoint', 'main.index'),))] == 5.0
+
+
+def test_idle_worker_publishes_its_last_requests(make_app, tmp_path):
+    app = make_app(METRICS_FLUSH_INTERVAL=0.05)
+    metrics.store.clear()
+    client = app.test_client()
+    for _ in range(3):
+        client.get('/languages')
+
+    path = tmp_path / 'metrics' / f'metrics_{os.getpid()}.json'
+    key = ('timeless_http_request_duration_seconds',
+           (('endpoint', 'api.get_languages'), ('method', 'GET'), ('status', '200')))
+    deadline = time.monotonic() + 5
+    count = 0
+    while count < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+        if path.exists():
+            count = merge_snapshots([json.loads(path.read_text())]).get(key, [0])[-1]
+    assert count == 3
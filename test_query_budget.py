@@ -0,0 +1,58 @@
+import pytest
+
+from models import db, User, Article, Comment
+from query_budget import QueryBudgetExceeded, normalize_sql, query_budget
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(QUERY_BUDGETS={'listing': {'max_queries': 10, 'max_repeats': 1}},
+                   QUERY_BUDGET_ENFORCE=True)
+
+    @app.route('/listing')
+    def listing():
+        # Touching article.author per row is the classic lazy-load N+1
+        return ', '.join(f'{a.title} by {a.author.username}' for a in Article.query.all())
+
+    with app.app_context():
+        for i in range(3):
+            user = User(username=f'user{i}', email=f'user{i}@example.com')
+            db.session.add(Article(title=f'Temple {i}', description='A heritage site',
+                                   state='Telangana', district='Mulugu', village='Palampet',
+                                   author=user))
+        db.session.commit()
+    return app
+
+
+def test_normalize_sql_collapses_literals_and_in_lists():
+    a = normalize_sql("SELECT * FROM article WHERE id IN (?, ?, ?) AND state = 'Kerala'")
+    b = normalize_sql("SELECT *  FROM article\nWHERE id IN (?) AND state = 'Goa'")
+    assert a == b == 'SELECT * FROM article WHERE id IN (?) AND state = ?'
+
+
+def test_query_budget_flags_repeated_lazy_loads(app):
+    with app.app_context():
+        with pytest.raises(QueryBudgetExceeded, match='FROM user'):
+            with query_budget(db.engine, max_repeats=1):
+                [article.author.username for article in Article.query.all()]
+        db.session.expire_all()
+        with query_budget(db.engine, max_queries=1, max_repeats=1) as recorder:
+            Article.query.all()
+        assert recorder.report.count == 1
+
+
+def test_enforced_route_budget_fails_request(client):
+    with pytest.raises(QueryBudgetExceeded, match='listing'):
+        client.get('/listing')
+
+
+def test_shipped_budgets_hold_for_the_main_pages(make_app, login):
+    app = make_app(articles=8, QUERY_BUDGET_ENFORCE=True)
+    with app.app_context():
+        db.session.add(Comment(body='Beautiful carvings', user_id=1, article_id=1))
+        db.session.commit()
+    for client in (app.test_client(), login(app.test_client())):
+        for path in ('/', '/?state=Telangana&district=Mulugu&village=Palampet&page=2',
+                     '/search?query=temple', '/search?query=temple&page=2',
+                     '/api/search?query=temple', '/article/1'):
+            assert client.get(path).status_code == 200, path
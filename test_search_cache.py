@@ -0,0 +1,65 @@
+from models import db, Article
+from query_budget import query_budget
+from search_cache import SearchCache, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query('  Ramappa   TEMPLE ') == 'ramappa temple'
+    # LIKE is only case-insensitive for ASCII, so other scripts keep their case
+    assert normalize_query(' Église ') == 'Église'
+
+
+def test_hits_until_generation_bump():
+    cache = SearchCache()
+    calls = []
+    compute = lambda: calls.append(1) or {'results': ['Ramappa']}
+    assert cache.cached('main.search', ('temple', 1), compute) == {'results': ['Ramappa']}
+    cache.cached('main.search', ('temple', 1), compute)
+    cache.cached('main.api_search', ('temple',), compute)
+    assert len(calls) == 2
+    cache.bump()
+    cache.cached('main.search', ('temple', 1), compute)
+    assert len(calls) == 3
+
+
+def test_lru_eviction_respects_entry_and_byte_caps():
+    cache = SearchCache()
+    cache.max_entries = 2
+    for query in ('a', 'b', 'c'):
+        cache.cached('main.api_search', (query,), lambda: b'x' * 10)
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['bytes'] == 20
+
+    cache.max_bytes = 25
+    cache.cached('main.api_search', ('d',), lambda: b'x' * 10)
+    cache.cached('main.api_search', ('e',), lambda: b'x' * 30)  # larger than the cap, never stored
+    assert cache.stats() == {'generation': 0, 'entries': 2, 'bytes': 20}
+
+
+def test_search_pages_are_served_from_cache_until_an_article_changes(app, user_client):
+    assert b'Temple 2' in user_client.get('/search?query=temple').data
+    user_client.get('/api/search?query=temple')
+    with app.app_context():
+        with query_budget(db.engine) as recorder:
+            page = user_client.get('/search?query=%20TEMPLE').data
+            results = user_client.get('/api/search?query=temple').get_json()
+        assert not any('FROM article' in statement for statement in recorder.report.statements)
+    assert b'Temple 2' in page and b'A heritage site, number 2' in page
+    assert [result['title'] for result in results['results']] == ['Temple 2', 'Temple 1', 'Temple 0']
+
+    user_client.post('/create', data={
+        'title': 'Temple of a thousand pillars', 'description': 'Built in 1163 by Rudra Deva.' * 3,
+        'state': 'Telangana', 'district': 'Hanamkonda', 'village': 'Hanamkonda'})
+    assert b'thousand pillars' in user_client.get('/search?query=temple').data
+
+
+def test_search_page_caches_only_the_excerpt(app, client):
+    with app.app_context():
+        db.session.get(Article, 1).description = 'Carved ' * 100
+        db.session.commit()
+    page = client.get('/search?query=temple').get_data(as_text=True)
+    assert ('Carved ' * 22)[:150] + '...' in page
+
+    [entry] = app.extensions['search_cache']._entries.values()
+    excerpts = [item['description'] for item in entry[2]['items']]
+    assert max(len(text) for text in excerpts) == 153
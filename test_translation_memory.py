@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import clients
+from models import db, SegmentTranslation
+from translation_memory import split_segments, translate_texts
+
+
+def fake_translator(sent):
+    def translate(segment):
+        sent.append(segment)
+        return segment.upper()
+    return translate
+
+
+def test_split_segments_round_trips():
+    text = 'Ramappa was built in 1213. Its pillars glow!<br><br>&nbsp;&nbsp;मंदिर सुंदर है। बहुत पुराना।\nEnd'
+    parts = split_segments(text)
+    assert ''.join(parts) == text
+    assert parts[0::2] == ['Ramappa was built in 1213.', 'Its pillars glow!', '&nbsp;&nbsp;मंदिर सुंदर है।',
+                           'बहुत पुराना।', 'End']
+
+
+def test_markup_is_never_split_or_translated(app):
+    text = '<p>Visit <a title="Fig. 1 > map">here</a>. Now!</p>'
+    parts = split_segments(text)
+    assert ''.join(parts) == text
+    assert parts[1::2] == ['<p>', ' <a title="Fig. 1 > map">', '</a>', ' ', '</p>']
+
+    sent = []
+    with app.app_context():
+        assert translate_texts([text], 'hi', fake_translator(sent)) == [
+            '<p>VISIT <a title="Fig. 1 > map">HERE</a>. NOW!</p>']
+    assert sorted(sent) == ['Now!', 'Visit', 'here']
+
+
+def test_only_changed_segments_are_retranslated(app):
+    sent = []
+    original = 'The temple is old. The pillars are carvd.<br>It is in Mulugu.'
+    edited = 'The temple is old. The pillars are carved.<br>It is in Mulugu.'
+    with app.app_context():
+        assert translate_texts([original, '  '], 'hi', fake_translator(sent)) == [
+            'THE TEMPLE IS OLD. THE PILLARS ARE CARVD.<br>IT IS IN MULUGU.', '']
+        assert len(sent) == 3
+
+        sent.clear()
+        assert translate_texts([edited], 'hi', fake_translator(sent)) == [
+            'THE TEMPLE IS OLD. THE PILLARS ARE CARVED.<br>IT IS IN MULUGU.']
+        assert sent == ['The pillars are carved.']
+
+        # Stored per language
+        sent.clear()
+        translate_texts([edited], 'ta', fake_translator(sent))
+        assert len(sent) == 3
+
+
+def test_translate_endpoint_uses_the_memory(client, monkeypatch):
+    sent = []
+    monkeypatch.setattr(clients, 'translate', lambda text, language: fake_translator(sent)(text))
+    body = {'texts': ['The temple is old. It is in Mulugu.'], 'target_lang': 'hi'}
+    for _ in range(2):
+        response = client.post('/translate', json=body)
+        assert response.status_code == 200
+        assert response.get_json()['translations'] == ['THE TEMPLE IS OLD. IT IS IN MULUGU.']
+    assert sorted(sent) == ['It is in Mulugu.', 'The temple is old.']
+
+
+def test_translate_endpoint_rejects_oversized_batches(make_app, monkeypatch):
+    sent = []
+    monkeypatch.setattr(clients, 'translate', lambda text, language: fake_translator(sent)(text))
+    client = make_app(TRANSLATE_MAX_TEXTS=3, TRANSLATE_MAX_CHARS=100).test_client()
+    assert client.post('/translate', json={'texts': ['Old.'] * 4, 'target_lang': 'hi'}).status_code == 400
+    assert client.post('/translate', json={'texts': ['x' * 101], 'target_lang': 'hi'}).status_code == 400
+    assert sent == []
+    assert client.post('/translate', json={'texts': ['Old.'] * 3, 'target_lang': 'hi'}).status_code == 200
+
+
+def test_long_segments_are_not_stored(app):
+    sent = []
+    long_sentence = 'A very long sentence ' * 10 + 'ends here.'
+    with app.app_context():
+        for _ in range(2):
+            translate_texts([f'Short one. {long_sentence}'], 'hi', fake_translator(sent), max_stored_length=100)
+        assert sorted(sent) == [long_sentence, long_sentence, 'Short one.']
+        assert SegmentTranslation.query.count() == 1
+
+
+def test_prune_deletes_old_rows(app):
+    with app.app_context():
+        translate_texts(['Old one. New one.'], 'hi', fake_translator([]))
+        old = SegmentTranslation.query.filter_by(text='OLD ONE.').one()
+        old.timestamp = datetime.utcnow() - timedelta(days=200)
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['prune-translations', '--older-than', '180'])
+    assert result.output.startswith('Deleted 1 segment translations')
+    with app.app_context():
+        assert [row.text for row in SegmentTranslation.query] == ['NEW ONE.']
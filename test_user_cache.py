@@ -0,0 +1,54 @@
+from models import db, User, Article
+from query_budget import query_budget
+
+
+def test_cached_user_is_loaded_without_a_query(app):
+    cache = app.extensions['user_cache']
+    with app.app_context():
+        assert cache.load(1).username == 'ravi'
+        db.session.remove()
+        with query_budget(db.engine) as recorder:
+            user = cache.load(1)
+            assert user.username == 'ravi' and user.check_password('old-password')
+        assert recorder.report.count == 0
+        # The cached user is attached to the session, so it can own new rows
+        db.session.add(Article(title='Ramappa', description='A temple', state='Telangana',
+                               district='Mulugu', village='Palampet', author=user))
+        db.session.commit()
+        assert user.articles.count() == 4
+
+
+def test_invalidate_after_password_change_and_delete(app):
+    cache = app.extensions['user_cache']
+    with app.app_context():
+        user = cache.load(1)
+        user.set_password('new-password')
+        db.session.commit()
+        cache.invalidate(1)
+        db.session.remove()
+        assert cache.load(1).check_password('new-password')
+
+        db.session.delete(db.session.get(User, 1))
+        db.session.commit()
+        cache.invalidate(1)
+        db.session.remove()
+        assert cache.load(1) is None
+
+
+def test_zero_ttl_disables_the_cache(make_app):
+    app = make_app(USER_CACHE_TTL=0)
+    cache = app.extensions['user_cache']
+    with app.app_context():
+        cache.load(1)
+        db.session.remove()
+        with query_budget(db.engine) as recorder:
+            cache.load(1)
+        assert recorder.report.count == 1
+
+
+def test_logged_in_requests_reuse_the_cached_user(app, user_client):
+    user_client.get('/')
+    with app.app_context():
+        with query_budget(db.engine) as recorder:
+            assert b'Temple 0' in user_client.get('/profile').data
+    assert not any('FROM user' in statement for statement in recorder.report.statements)
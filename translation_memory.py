@@ -0,0 +1,172 @@
+"""
+Sentence-level translation memory.
+
+Texts sent to /translate (the innerHTML of article elements) are split into
+segments at markup, line breaks and sentence ends: tags are never translated or
+cut, so a sentence with a link in it becomes the text before, inside and after
+the link. Each segment's translation is stored per language under the SHA-256
+of its source text, so when an author fixes a typo in one sentence of a long
+description only that sentence goes back to the translator; the rest of the
+document is reassembled from stored segments. Tags, line breaks and the
+whitespace around segments are copied through untouched.
+
+Rows are never rewritten: an edited sentence has a new hash and gets a new
+row. Segments longer than TRANSLATION_MEMORY_MAX_SEGMENT are translated but not
+stored, and ``flask prune-translations`` deletes rows older than a number of
+days so the table does not grow forever. Lookups fall back to translating
+every segment when the segment_translation table is missing (run
+``flask db upgrade``).
+"""
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+import clients
+from metrics import metrics
+from models import SegmentTranslation, db
+
+logger = logging.getLogger(__name__)
+
+# A tag, allowing '>' inside quoted attribute values (innerHTML does not escape it there)
+TAG = re.compile(r'''<(?:[^>"']|"[^"]*"|'[^']*')*>''')
+# Capturing group: re.split keeps separators at odd indexes
+SENTENCE_BOUNDARY = re.compile(r'(\n+|(?<=[.!?।॥])\s+)')
+_EDGE_WHITESPACE = re.compile(r'(\s*)(.*?)(\s*)', re.DOTALL)
+LOOKUP_CHUNK = 500
+
+_INSERT = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def split_segments(text):
+    """
+    Split text into [segment, separator, segment, ...]; ''.join() gives the
+    text back. Separators hold tags, line breaks and whitespace between
+    sentences; segments are text only.
+    """
+    parts = ['']  # even indexes are segments, odd ones separators
+
+    def add(piece, separator):
+        if not piece:
+            return
+        if separator == (len(parts) % 2 == 0):
+            parts[-1] += piece
+        else:
+            parts.append(piece)
+
+    position = 0
+    for tag in [*TAG.finditer(text), None]:
+        end = tag.start() if tag else len(text)
+        leading, body, trailing = _EDGE_WHITESPACE.fullmatch(text[position:end]).groups()
+        add(leading, True)
+        for i, piece in enumerate(SENTENCE_BOUNDARY.split(body)):
+            add(piece, i % 2 == 1)
+        add(trailing, True)
+        if tag:
+            add(tag.group(), True)
+            position = tag.end()
+    if len(parts) % 2 == 0:
+        parts.append('')
+    return parts
+
+
+def has_words(segment):
+    """Segments of only punctuation (e.g. the '.' after a link) are copied, not translated"""
+    return any(char.isalnum() for char in segment)
+
+
+def segment_hash(segment):
+    return hashlib.sha256(segment.encode('utf-8')).hexdigest()
+
+
+def _lookup(hashes, language):
+    known = {}
+    hashes = list(hashes)
+    for i in range(0, len(hashes), LOOKUP_CHUNK):
+        rows = db.session.query(SegmentTranslation.segment_hash, SegmentTranslation.text).filter(
+            SegmentTranslation.language == language,
+            SegmentTranslation.segment_hash.in_(hashes[i:i + LOOKUP_CHUNK]))
+        known.update(rows)
+    return known
+
+
+def _store(rows):
+    """Insert new segment translations, ignoring rows another request stored first"""
+    insert = _INSERT.get(db.engine.dialect.name)
+    try:
+        if insert is not None:
+            db.session.execute(insert(SegmentTranslation.__table__).on_conflict_do_nothing(), rows)
+        else:
+            db.session.execute(SegmentTranslation.__table__.insert(), rows)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.warning('Could not store %d segment translations: %s', len(rows), e)
+
+
+def translate_texts(texts, language, translate_segment, max_stored_length=1000):
+    """
+    Translate texts into language, calling translate_segment(segment) only for
+    segments without a stored translation. Only segments of at most
+    max_stored_length characters are stored. Empty texts come back as ''. The
+    first failing segment's exception is raised.
+    """
+    documents = [split_segments(text) if text and text.strip() else None for text in texts]
+    wanted = {}
+    for parts in documents:
+        for segment in (parts or [])[0::2]:
+            if has_words(segment):
+                wanted.setdefault(segment_hash(segment), segment)
+
+    try:
+        known = _lookup(wanted, language)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.warning('Translation memory unavailable, translating every segment: %s', e)
+        known = {}
+        memory_available = False
+    else:
+        memory_available = True
+
+    missing = [(key, segment) for key, segment in wanted.items() if key not in known]
+    metrics.store.inc('timeless_translation_segments_total', {'outcome': 'stored'}, len(known))
+    metrics.store.inc('timeless_translation_segments_total', {'outcome': 'translated'}, len(missing))
+
+    results = clients.map_outbound(lambda item: translate_segment(item[1]), missing)
+    new_rows = []
+    for (key, segment), (translated, error) in zip(missing, results):
+        if error is not None:
+            raise error
+        known[key] = translated
+        if len(segment) <= max_stored_length:
+            new_rows.append({'segment_hash': key, 'language': language, 'text': translated})
+    if new_rows and memory_available:
+        _store(new_rows)
+
+    translations = []
+    for parts in documents:
+        if parts is None:
+            translations.append('')
+            continue
+        translations.append(''.join(
+            known[segment_hash(part)] if i % 2 == 0 and has_words(part) else part
+            for i, part in enumerate(parts)))
+    return translations
+
+
+@click.command('prune-translations')
+@click.option('--older-than', 'days', type=int, default=180, show_default=True,
+              help='Delete segment translations stored more than this many days ago.')
+@with_appcontext
+def prune_translations_command(days):
+    """Delete old rows from the translation memory."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    result = db.session.execute(delete(SegmentTranslation).where(SegmentTranslation.timestamp < cutoff))
+    db.session.commit()
+    click.echo(f'Deleted {result.rowcount} segment translations stored before {cutoff:%Y-%m-%d}')
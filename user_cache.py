@@ -0,0 +1,83 @@
+"""
+Identity cache for Flask-Login.
+
+load_user runs on every request from a logged-in user. The cache keeps the
+column values of recently seen users per process (bounded LRU with a TTL) and
+rebuilds current_user from them without a query. The rebuilt object is merged
+into the request's session with load=False, so relationships, set_password()
+and commits behave exactly as for a loaded user.
+
+Each worker has its own cache. Publish 'users' on the invalidation bus when
+changing or deleting a user (see invalidation.py) and every worker clears it;
+USER_CACHE_TTL only bounds staleness if the bus is unavailable.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from metrics import metrics
+from models import User, db
+
+
+class UserCache:
+    """Flask extension caching User rows for the user_loader"""
+
+    def __init__(self, app=None):
+        self.ttl = 600.0
+        self.max_size = 1024
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = float(app.config.setdefault('USER_CACHE_TTL', 600.0))
+        self.max_size = int(app.config.setdefault('USER_CACHE_SIZE', 1024))
+        app.extensions['user_cache'] = self
+
+    def load(self, user_id):
+        """Return the User for user_id, from the cache when a fresh entry exists"""
+        if self.ttl <= 0:
+            return db.session.get(User, user_id)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                state = entry[1]
+            else:
+                state = None
+
+        if state is None:
+            metrics.store.inc('timeless_user_cache_lookups_total', {'outcome': 'miss'})
+            user = db.session.get(User, user_id)
+            if user is not None:
+                self._store(user_id, {attr.key: getattr(user, attr.key)
+                                      for attr in User.__mapper__.column_attrs}, now)
+            return user
+
+        metrics.store.inc('timeless_user_cache_lookups_total', {'outcome': 'hit'})
+        user = User(**state)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    def _store(self, user_id, state, now):
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, state)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()